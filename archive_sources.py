@@ -0,0 +1,267 @@
+"""DDLC Mod Installer Archive Sources
+
+Every supported archive is read as a source of (path, size, is_dir, stream)
+entries in one sequential pass over the input, so a mod can be installed
+straight from a .tar.gz, .tar.xz or .tar.zst, or from a zip inside a zip,
+without unpacking anything to disk first.
+
+Streams are only valid until the next entry is taken from the source.
+Archives found inside an archive, outside of the game directories, are
+opened from the outer stream and their entries are listed below a folder
+named after the inner archive.
+"""
+import os
+import bz2
+import zlib
+import struct
+import tarfile
+import zipfile
+from collections import namedtuple
+from planner import TARGET_DIRS, zip_member_parts
+
+CHUNK_SIZE = 1024 * 1024
+
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ZSTD_EXTENSIONS = ('.tar.zst', '.tzst')
+ARCHIVE_EXTENSIONS = ('.zip',) + TAR_EXTENSIONS + ZSTD_EXTENSIONS
+
+# Local file header of a zip member, see zipfile.structFileHeader
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+ZIP64_EXTRA_ID = 0x0001
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['path', 'size', 'is_dir', 'stream'])
+
+
+class ArchiveError(Exception):
+    """An archive that cannot be read as a stream."""
+
+
+def archive_extension(name):
+    """The archive extension name ends in, or None if it is not a supported archive."""
+    lower = name.lower()
+    for extension in ARCHIVE_EXTENSIONS:
+        if lower.endswith(extension):
+            return extension
+    return None
+
+def is_archive(name):
+    return archive_extension(name) is not None
+
+def _zstd_reader(fileobj):
+    """Wrap fileobj in a zstd decompressor, from the stdlib (3.14+) or the zstandard package."""
+    try:
+        from compression import zstd
+        return zstd.ZstdFile(fileobj)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ArchiveError("Reading .tar.zst archives needs the 'zstandard' package.") from None
+    return zstandard.ZstdDecompressor().stream_reader(fileobj)
+
+
+class _PushbackReader:
+    """A sequential reader that can take back bytes a decompressor read too far."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.pushed = b''
+
+    def read(self, size):
+        if self.pushed:
+            data, self.pushed = self.pushed[:size], self.pushed[size:]
+            return data
+        return self.fileobj.read(size)
+
+    def read_exactly(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.read(size - len(data))
+            if not chunk:
+                raise ArchiveError("Unexpected end of a zip archive.")
+            data += chunk
+        return data
+
+    def unread(self, data):
+        self.pushed = data + self.pushed
+
+
+class _ZipMemberStream:
+    """Decompresses one member of a zip that is read front to back."""
+
+    def __init__(self, source, name, method, compressed_size, size, crc, flags, zip64):
+        self.source = source
+        self.name = name
+        self.size = size
+        self.crc = crc
+        self.flags = flags
+        self.zip64 = zip64
+        # Without a data descriptor the compressed size is known and nothing is over-read
+        self._remaining = None if flags & FLAG_DATA_DESCRIPTOR else compressed_size
+        if method == zipfile.ZIP_STORED:
+            if self._remaining is None:
+                raise ArchiveError(f"{name}: stored members without sizes cannot be streamed.")
+            self._decompressor = None
+        elif method == zipfile.ZIP_DEFLATED:
+            self._decompressor = zlib.decompressobj(-15)
+        elif method == zipfile.ZIP_BZIP2:
+            self._decompressor = bz2.BZ2Decompressor()
+        else:
+            raise ArchiveError(f"{name}: unsupported compression method {method}.")
+        self._buffer = bytearray()
+        self._running_crc = 0
+        self._written = 0
+        self._eof = False
+        self._finished = False
+
+    def _fill(self, size):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            want = CHUNK_SIZE if self._remaining is None else min(CHUNK_SIZE, self._remaining)
+            data = self.source.read(want) if want else b''
+            if want and not data:
+                raise ArchiveError(f"{self.name}: unexpected end of the archive.")
+            if self._remaining is not None:
+                self._remaining -= len(data)
+            if self._decompressor is None:
+                self._buffer += data
+                self._eof = self._remaining == 0
+                continue
+            self._buffer += self._decompressor.decompress(data)
+            if self._decompressor.eof:
+                self.source.unread(self._decompressor.unused_data)
+                self._eof = True
+            elif self._remaining == 0:
+                raise ArchiveError(f"{self.name}: compressed data is truncated.")
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        self._running_crc = zlib.crc32(data, self._running_crc)
+        self._written += len(data)
+        if self._eof and not self._buffer:
+            self._finish()
+        return data
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.flags & FLAG_DATA_DESCRIPTOR:
+            signature = self.source.read_exactly(4)
+            if signature != DESCRIPTOR_SIGNATURE:
+                self.source.unread(signature)
+            size_format = '<LQQ' if self.zip64 else '<LLL'
+            self.crc, _, self.size = struct.unpack(
+                size_format, self.source.read_exactly(struct.calcsize(size_format)))
+        if self._written != self.size or self._running_crc != self.crc:
+            raise ArchiveError(f"Bad CRC-32 or size for {self.name}.")
+
+    def skip(self):
+        """Read past whatever is left of the member."""
+        while not self._finished:
+            self.read(CHUNK_SIZE)
+
+
+def _zip64_sizes(extra, compressed_size, size):
+    """Take the real sizes from a zip64 extra field where the header has placeholders."""
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, length = struct.unpack('<HH', extra[offset:offset + 4])
+        if field_id == ZIP64_EXTRA_ID:
+            values = list(struct.unpack(f'<{length // 8}Q', extra[offset + 4:offset + 4 + length // 8 * 8]))
+            if size == 0xFFFFFFFF and values:
+                size = values.pop(0)
+            if compressed_size == 0xFFFFFFFF and values:
+                compressed_size = values.pop(0)
+            return compressed_size, size, True
+        offset += 4 + length
+    return compressed_size, size, False
+
+def stream_zip(fileobj, prefix=''):
+    """Yield the entries of a zip read front to back from its local headers.
+
+    Used for zips that can only be read sequentially, like a zip inside
+    another archive. The central directory is never needed.
+    """
+    source = _PushbackReader(fileobj)
+    while True:
+        signature = source.read(4)
+        if signature != LOCAL_HEADER_SIGNATURE:
+            return  # Central directory, or an empty archive
+        header = LOCAL_HEADER.unpack(signature + source.read_exactly(LOCAL_HEADER.size - 4))
+        flags, method, crc, compressed_size, size = header[3], header[4], header[7], header[8], header[9]
+        raw_name = source.read_exactly(header[10])
+        extra = source.read_exactly(header[11])
+        name = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+        if flags & FLAG_ENCRYPTED:
+            raise ArchiveError(f"{name}: encrypted archives are not supported.")
+        compressed_size, size, zip64 = _zip64_sizes(extra, compressed_size, size)
+        stream = _ZipMemberStream(source, name, method, compressed_size, size, crc, flags, zip64)
+        yield from _entry(prefix + name, size, name.endswith('/'), stream)
+        stream.skip()
+
+def stream_tar(fileobj, prefix='', zstd=False):
+    """Yield the entries of a tar archive, decompressing it as it is read."""
+    if zstd:
+        fileobj = _zstd_reader(fileobj)
+    try:
+        with tarfile.open(fileobj=fileobj, mode='r|*') as tar_ref:
+            for member in tar_ref:
+                if member.isdir():
+                    yield from _entry(prefix + member.name, 0, True, None)
+                elif member.isfile():
+                    yield from _entry(prefix + member.name, member.size, False, tar_ref.extractfile(member))
+                # Links and devices are never part of a mod
+    except tarfile.TarError as e:
+        raise ArchiveError(f"Cannot read tar archive: {e}") from e
+
+def _entry(path, size, is_dir, stream):
+    """Yield one entry, or the entries inside it if it is an archive outside the game folders."""
+    parts = zip_member_parts(path)
+    if parts is None:
+        return
+    extension = None if is_dir else archive_extension(parts[-1])
+    if extension is None or any(part in TARGET_DIRS for part in parts[:-1]):
+        yield ArchiveEntry('/'.join(parts), size, is_dir, stream)
+        return
+    inner_prefix = '/'.join(parts[:-1] + [parts[-1][:-len(extension)]]) + '/'
+    if extension == '.zip':
+        yield from stream_zip(stream, inner_prefix)
+    else:
+        yield from stream_tar(stream, inner_prefix, extension in ZSTD_EXTENSIONS)
+
+def iter_entries(archive_path, fileobj=None):
+    """Yield every entry of the archive at archive_path in a single pass.
+
+    fileobj can be an already open binary file of the archive, e.g. one that
+    counts the bytes read for progress.
+    """
+    extension = archive_extension(archive_path)
+    if extension is None:
+        raise ArchiveError(f"Unsupported archive type: {os.path.basename(archive_path)}")
+    if fileobj is None:
+        with open(archive_path, 'rb') as fileobj:
+            yield from iter_entries(archive_path, fileobj)
+        return
+    if extension != '.zip':
+        yield from stream_tar(fileobj, '', extension in ZSTD_EXTENSIONS)
+        return
+    # The outer zip is a real file, so its central directory can be used
+    with zipfile.ZipFile(fileobj, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                yield from _entry(info.filename, 0, True, None)
+                continue
+            with zip_ref.open(info) as stream:
+                yield from _entry(info.filename, info.file_size, False, stream)
@@ -0,0 +1,12 @@
+"""DDMI Benchmarks
+
+Reproducible timings of the install engine on synthetic data shaped like
+DDLC and its mods. Everything runs headless, on Linux too:
+
+    python -m benchmarks.run --scale small --output before.json
+    python -m benchmarks.run --scale small --compare before.json
+
+fixtures builds the game trees and mod archives from a fixed seed,
+winreg_shim stands in for the Windows registry so Steam discovery can be
+timed, and run holds the scenarios and writes the JSON results.
+"""
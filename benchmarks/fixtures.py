@@ -0,0 +1,133 @@
+"""Synthetic DDLC game trees, mod archives and Steam libraries for the benchmarks.
+
+Everything is generated from a fixed seed, so the same scale always gives
+byte-for-byte the same data.
+"""
+import os
+import random
+import zipfile
+from collections import namedtuple
+
+RPA_NAMES = ('audio.rpa', 'fonts.rpa', 'images.rpa', 'scripts.rpa')
+DDLC_APP_ID = '698780'
+
+# small_files: loose files spread over renpy/ and lib/; rpa_size: each of the four archives;
+# tiny_files and huge_size: the "many tiny files" and "few huge files" mod layouts
+Scale = namedtuple('Scale', ['small_files', 'rpa_size', 'tiny_files', 'huge_size', 'libraries'])
+SCALES = {
+    'small': Scale(2000, 4 * 1024 ** 2, 2000, 32 * 1024 ** 2, 5),
+    'medium': Scale(10000, 32 * 1024 ** 2, 10000, 256 * 1024 ** 2, 20),
+    'large': Scale(30000, 128 * 1024 ** 2, 30000, 1024 ** 3, 50),
+    }
+
+# name -> (root folder inside the zip, compression, contents)
+MOD_LAYOUTS = {
+    'nested-deflated': ('Example Mod/Example Mod', zipfile.ZIP_DEFLATED, 'mixed'),
+    'flat-stored': ('', zipfile.ZIP_STORED, 'mixed'),
+    'tiny-files': ('Tiny Mod', zipfile.ZIP_DEFLATED, 'tiny'),
+    'huge-files': ('Huge Mod', zipfile.ZIP_STORED, 'huge'),
+    }
+
+WORDS = [
+    'label', 'scene', 'show', 'hide', 'menu', 'jump', 'return', 'monika', 'sayori', 'yuri',
+    'natsuki', 'poem', 'club', 'window', 'music', 'play', 'stop', 'with', 'dissolve', 'python',
+    ]
+
+
+def text_bytes(rng, size):
+    """Compressible, script-like content."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words).encode()[:size]
+
+def random_file(path, size, rng, chunk_size=8 * 1024 ** 2):
+    """Write size incompressible bytes, the way .rpa, .ogg and .png content behaves."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        remaining = size
+        while remaining:
+            count = min(chunk_size, remaining)
+            file.write(rng.randbytes(count))
+            remaining -= count
+
+def make_game_tree(path, scale, seed=0):
+    """Build a directory shaped like a Steam copy of DDLC and return its path."""
+    rng = random.Random(seed)
+    for name in RPA_NAMES:
+        random_file(os.path.join(path, 'game', name), scale.rpa_size, rng)
+    random_file(os.path.join(path, 'DDLC.exe'), 512 * 1024, rng)
+    with open(os.path.join(path, 'DDLC.sh'), 'w', encoding='utf-8') as file:
+        file.write('#!/bin/sh\nexec ./lib/linux-x86_64/DDLC "$@"\n')
+    top_dirs = ['renpy', 'renpy/common', 'renpy/display', 'renpy/text', 'lib/linux-x86_64',
+                'lib/windows-i686/Lib', 'lib/darwin-x86_64']
+    for index in range(scale.small_files):
+        directory = top_dirs[index % len(top_dirs)]
+        sub_directory = f"pkg{index // 200}"
+        file_path = os.path.join(path, directory, sub_directory, f"module{index}.pyo")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            file.write(text_bytes(rng, rng.randint(200, 16 * 1024)))
+    return path
+
+def make_mod_zip(path, layout, scale, seed=1):
+    """Build a mod archive in one of MOD_LAYOUTS and return its path."""
+    root, compression, contents = MOD_LAYOUTS[layout]
+    rng = random.Random(seed)
+    prefix = f"{root}/" if root else ''
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with zipfile.ZipFile(path, 'w', compression) as zip_ref:
+        zip_ref.writestr(f"{prefix}README.txt", text_bytes(rng, 2048))
+        zip_ref.writestr(f"{prefix}DDLC.exe", rng.randbytes(256 * 1024))
+        if contents == 'tiny':
+            for index in range(scale.tiny_files):
+                zip_ref.writestr(f"{prefix}game/mod_assets/part{index // 500}/file{index}.rpy",
+                                 text_bytes(rng, rng.randint(100, 2048)))
+        elif contents == 'huge':
+            for name in ('images.rpa', 'audio.rpa'):
+                with zip_ref.open(zipfile.ZipInfo(f"{prefix}game/{name}"), 'w', force_zip64=True) as member:
+                    remaining = scale.huge_size
+                    while remaining:
+                        count = min(8 * 1024 ** 2, remaining)
+                        member.write(rng.randbytes(count))
+                        remaining -= count
+        else:
+            zip_ref.writestr(f"{prefix}game/scripts.rpa", rng.randbytes(scale.rpa_size))
+            for index in range(200):
+                zip_ref.writestr(f"{prefix}game/mod_assets/images/bg{index}.png", rng.randbytes(32 * 1024))
+            for index in range(300):
+                zip_ref.writestr(f"{prefix}game/script-ch{index}.rpyc", text_bytes(rng, 8 * 1024))
+    return path
+
+def make_steam_root(path, game_tree, libraries):
+    """Build a Steam directory whose libraryfolders.vdf lists libraries Steam libraries.
+
+    DDLC is only in the last one, as a symlink to game_tree where the
+    platform allows it (an empty folder otherwise). Returns the Steam path.
+    """
+    steamapps = os.path.join(path, 'steamapps')
+    os.makedirs(steamapps, exist_ok=True)
+    lines = ['"libraryfolders"', '{']
+    for index in range(libraries):
+        library = os.path.join(path, f"library{index}")
+        os.makedirs(os.path.join(library, 'steamapps', 'common'), exist_ok=True)
+        apps = {str(1000 + index): '1024'}
+        if index == libraries - 1:
+            apps[DDLC_APP_ID] = '1073741824'
+            game_path = os.path.join(library, 'steamapps', 'common', 'Doki Doki Literature Club')
+            if not os.path.lexists(game_path):
+                try:
+                    os.symlink(os.path.abspath(game_tree), game_path, target_is_directory=True)
+                except OSError:
+                    os.makedirs(game_path, exist_ok=True)
+        library_path = library.replace('\\', '\\\\')
+        lines += [f'\t"{index}"', '\t{', f'\t\t"path"\t\t"{library_path}"', '\t\t"apps"', '\t\t{']
+        lines += [f'\t\t\t"{app}"\t\t"{size}"' for app, size in apps.items()]
+        lines += ['\t\t}', '\t}']
+    lines.append('}')
+    with open(os.path.join(steamapps, 'libraryfolders.vdf'), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    return path
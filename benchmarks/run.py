@@ -0,0 +1,197 @@
+"""Run the DDMI benchmark scenarios and save the timings as JSON.
+
+    python -m benchmarks.run [--scale small|medium|large] [--repeat N] [--only TEXT]
+                             [--output results.json] [--compare baseline.json]
+
+Each scenario gets an untimed setup before every repetition (a fresh copy
+of the game to install into, an empty target, ...) and the median of the
+timed runs is reported. --compare prints each scenario's change against a
+results file from another commit.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from collections import namedtuple
+from benchmarks import fixtures, winreg_shim
+
+# setup(work) runs untimed before every repetition and returns the arguments of run
+Scenario = namedtuple('Scenario', ['name', 'setup', 'run', 'files', 'bytes'])
+
+REGRESSION_THRESHOLD = 0.10
+
+
+def tree_totals(path):
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+def zip_totals(path):
+    import zipfile
+    with zipfile.ZipFile(path) as zip_ref:
+        infos = [info for info in zip_ref.infolist() if not info.is_dir()]
+    return len(infos), sum(info.file_size for info in infos)
+
+def fresh_copy(src, dst):
+    shutil.rmtree(dst, ignore_errors=True)
+    shutil.copytree(src, dst, symlinks=True)
+    return dst
+
+def build_scenarios(work, scale):
+    """Generate the fixtures under work and return every scenario."""
+    import installer
+    import steam
+    from settings import cache_dir
+
+    game = fixtures.make_game_tree(os.path.join(work, 'fixtures', 'Doki Doki Literature Club'), scale)
+    game_files, game_bytes = tree_totals(game)
+    mods = {
+        layout: fixtures.make_mod_zip(os.path.join(work, 'fixtures', f"{layout}.zip"), layout, scale)
+        for layout in fixtures.MOD_LAYOUTS
+        }
+    steam_root = fixtures.make_steam_root(os.path.join(work, 'fixtures', 'Steam'), game, scale.libraries)
+    winreg_shim.install(steam_root)
+    target = os.path.join(work, 'target')
+
+    def empty_target():
+        shutil.rmtree(target, ignore_errors=True)
+        return ()
+
+    def game_copy():
+        return (fresh_copy(game, target),)
+
+    def cold_cache():
+        shutil.rmtree(cache_dir(), ignore_errors=True)
+        return game_copy()
+
+    scenarios = []
+    for layout, zip_path in mods.items():
+        files, size = zip_totals(zip_path)
+        scenarios.append(Scenario(
+            f"install-direct/{layout}", game_copy,
+            lambda path, zip_path=zip_path: installer.install_mod(zip_path, path),
+            files, size))
+    zip_path = mods['nested-deflated']
+    files, size = zip_totals(zip_path)
+    scenarios += [
+        Scenario("install-extract/nested-deflated", cold_cache,
+                 lambda path: installer.install_mod(zip_path, path, direct=False), files, size),
+        Scenario("install-separate/nested-deflated", empty_target,
+                 lambda: installer.install_mod(zip_path, game, target), files + game_files, size + game_bytes),
+        # Only the first run fills the store; later ones just link, which is what repeat installs see
+        Scenario("install-separate-store/nested-deflated", empty_target,
+                 lambda: installer.install_mod(zip_path, game, target, use_store=True), files, size),
+        Scenario("copy_game_files", empty_target,
+                 lambda: installer.copy_game_files(game, target, [0], game_bytes), game_files, game_bytes),
+        Scenario("merge_directories", empty_target,
+                 lambda: installer.merge_directories(os.path.join(game, 'renpy'), 'renpy', [0], target, game_bytes),
+                 *tree_totals(os.path.join(game, 'renpy'))),
+        Scenario("delete_directory_with_progress", game_copy,
+                 lambda path: installer.delete_directory_with_progress(path, game_bytes), game_files, game_bytes),
+        Scenario("steam-discovery", lambda: (), steam.find_game_directory, 0, 0),
+        ]
+    return scenarios
+
+def run_scenario(scenario, repeat):
+    timings = []
+    for _ in range(repeat):
+        args = scenario.setup()
+        start = time.perf_counter()
+        scenario.run(*args)
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        'runs': timings,
+        'median': median,
+        'min': min(timings),
+        'files': scenario.files,
+        'bytes': scenario.bytes,
+        'mb_per_s': scenario.bytes / 1048576 / median if median else None,
+        'files_per_s': scenario.files / median if median else None,
+        }
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, out=sys.stdout):
+    """Print each scenario's median against the baseline; returns the number of regressions."""
+    regressions = 0
+    out.write(f"Against {baseline.get('commit') or 'baseline'} (scale {baseline.get('scale')}):\n")
+    for name, result in results['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if old is None:
+            out.write(f"  {name:<40} new\n")
+            continue
+        change = result['median'] / old['median'] - 1 if old['median'] else 0.0
+        flag = ''
+        if change > REGRESSION_THRESHOLD:
+            flag = '  SLOWER'
+            regressions += 1
+        elif change < -REGRESSION_THRESHOLD:
+            flag = '  faster'
+        out.write(f"  {name:<40} {old['median']:>8.3f}s -> {result['median']:>8.3f}s {change:>+7.1%}{flag}\n")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description="DDMI benchmarks")
+    parser.add_argument('--scale', choices=sorted(fixtures.SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per scenario (default: 3)")
+    parser.add_argument('--only', help="run only scenarios whose name contains this text")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--workdir', help="where fixtures are generated (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    work = args.workdir or tempfile.mkdtemp(prefix='ddmi-bench-')
+    # Keep the extraction cache, traces and manifests of the runs away from the real DDMI data
+    os.environ['DDMI_HOME'] = os.path.join(work, 'home')
+    try:
+        print(f"Generating {args.scale} fixtures in {work} ...")
+        scenarios = build_scenarios(work, fixtures.SCALES[args.scale])
+        results = {
+            'commit': current_commit(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'scenarios': {},
+            }
+        for scenario in scenarios:
+            if args.only and args.only not in scenario.name:
+                continue
+            result = run_scenario(scenario, args.repeat)
+            results['scenarios'][scenario.name] = result
+            rate = f"{result['mb_per_s']:.1f} MB/s" if result['mb_per_s'] and scenario.bytes else ''
+            print(f"{scenario.name:<40} {result['median']:>8.3f}s  {rate}")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(work, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to: {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        return 1 if compare(results, baseline) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Stand-in for the winreg module, so Steam discovery runs off Windows.
+
+install() puts it into sys.modules with a Steam InstallPath pointing at a
+fake Steam directory; steam.get_steam_path then reads it like the registry.
+"""
+import os
+import sys
+import types
+
+HKEY_LOCAL_MACHINE = 0x80000002
+KEY_READ = 0x20019
+
+_values = {}
+
+
+def OpenKey(key, sub_key, reserved=0, access=KEY_READ):
+    if (key, sub_key) not in _values:
+        raise FileNotFoundError(f"[WinError 2] The system cannot find the file specified: {sub_key}")
+    return (key, sub_key)
+
+def QueryValueEx(key, value_name):
+    try:
+        return _values[key][value_name], 1  # REG_SZ
+    except KeyError:
+        raise FileNotFoundError(f"[WinError 2] The system cannot find the file specified: {value_name}") from None
+
+def install(steam_path):
+    """Register steam_path as Steam's InstallPath and make `import winreg` return this module."""
+    os.environ.setdefault('PROCESSOR_ARCHITECTURE', 'AMD64')
+    for key_path in (r"SOFTWARE\Valve\Steam", r"SOFTWARE\Wow6432Node\Valve\Steam"):
+        _values[(HKEY_LOCAL_MACHINE, key_path)] = {'InstallPath': steam_path}
+    module = types.ModuleType('winreg')
+    module.__dict__.update(
+        HKEY_LOCAL_MACHINE=HKEY_LOCAL_MACHINE, KEY_READ=KEY_READ, OpenKey=OpenKey, QueryValueEx=QueryValueEx)
+    sys.modules['winreg'] = module
+    return module
@@ -0,0 +1,187 @@
+"""DDLC Mod Installer Content Store
+
+A content-addressed store of game files for "Install Mod to Separate
+Directory". Each file is copied into the store once, named by the SHA-256
+of its contents (objects/ab/cdef...), and every mod directory gets hard
+links to those blobs instead of its own copy of the game. Only the files a
+mod writes are real files in its directory, so each extra mod directory
+costs about the size of the mod.
+
+The installer's writers replace a linked file instead of writing into it
+(copy_engine.unshare), so installing a mod over a linked file never changes
+the blob. Blobs are also made read-only against other programs; on Windows
+that flag is shared by every link, so DDMI deletes links with
+copy_engine.remove_file. A program that clears the flag and edits a linked
+file in place still changes it for every mod directory. A blob is
+referenced by nothing but the store once its link count drops back to 1;
+gc removes those.
+
+Hashes of the game's files are remembered by path, size and mtime, so
+linking the same game again only costs a stat per file. When the store and
+the mod directory are on different drives, or the filesystem has no hard
+links, files are copied from the store instead.
+"""
+import os
+import json
+import stat
+import errno
+import hashlib
+import threading
+from collections import namedtuple
+from settings import store_dir
+import control
+import copy_engine
+
+HASH_CHUNK_SIZE = 1024 * 1024
+INDEX_NAME = 'index.json'
+OBJECTS_DIR = 'objects'
+# Errors from os.link that mean "use a copy instead"
+LINK_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOSYS, errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+    }
+LINKED = 'hardlink'
+# stat.S_IREAD is what os.chmod maps to the read-only attribute on Windows
+READ_ONLY = stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH
+
+StoreStats = namedtuple('StoreStats', ['blobs', 'size', 'unreferenced', 'unreferenced_size', 'saved'])
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents as a hex string."""
+    digest = hashlib.sha256()
+    with open(path, 'rb', buffering=0) as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            control.checkpoint(len(chunk))
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """Hash-named blobs of game files, linked into mod directories."""
+
+    def __init__(self, path=None):
+        self.path = path or store_dir()
+        self.objects_path = os.path.join(self.path, OBJECTS_DIR)
+        self.index_path = os.path.join(self.path, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # absolute source path -> [size, mtime_ns, digest]
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self.index = json.load(file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_path, digest[:2], digest[2:])
+
+    def digest(self, src):
+        """SHA-256 of src, from the index while its size and mtime are unchanged."""
+        key = os.path.abspath(src)
+        status = os.stat(src)
+        with self._lock:
+            known = self.index.get(key)
+        if known is not None and known[:2] == [status.st_size, status.st_mtime_ns]:
+            return known[2]
+        digest = file_digest(src)
+        with self._lock:
+            self.index[key] = [status.st_size, status.st_mtime_ns, digest]
+            self._dirty = True
+        return digest
+
+    def add(self, src):
+        """Put a copy of src into the store if its contents are not there yet; returns the blob path."""
+        blob = self.blob_path(self.digest(src))
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            # Unique per thread, so two workers adding the same contents do not collide
+            temp_path = f"{blob}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                copy_engine.fast_copy(src, temp_path)
+                os.chmod(temp_path, READ_ONLY)
+                try:
+                    os.replace(temp_path, blob)
+                except PermissionError:
+                    # Windows cannot replace a read-only file, here one another worker just added
+                    if not os.path.exists(blob):
+                        raise
+            finally:
+                if os.path.exists(temp_path):
+                    copy_engine.remove_file(temp_path)
+        return blob
+
+    def link(self, src, dst):
+        """Make dst a hard link to the blob holding src's contents, or a copy of it.
+
+        Returns 'hardlink' or the copy strategy, like copy_engine.fast_copy.
+        """
+        blob = self.add(src)
+        if os.path.lexists(dst):
+            copy_engine.remove_file(dst)
+        try:
+            os.link(blob, dst)
+            return LINKED
+        except OSError as e:
+            if e.errno not in LINK_FALLBACK_ERRNOS:
+                raise
+        strategy = copy_engine.fast_copy(blob, dst)
+        os.chmod(dst, READ_ONLY | stat.S_IWRITE)  # A copy is the mod directory's own
+        return strategy
+
+    def save(self):
+        """Write the hash index, dropping sources that no longer exist."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.index = {path: value for path, value in self.index.items() if os.path.exists(path)}
+            self._dirty = False
+            index = dict(self.index)
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"  # Batch installs save from several processes
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(index, file, separators=(',', ':'))
+        os.replace(temp_path, self.index_path)
+
+    def blobs(self):
+        """Yield (path, os.stat_result) of every blob."""
+        if not os.path.isdir(self.objects_path):
+            return
+        for prefix in os.scandir(self.objects_path):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    # DirEntry.stat leaves st_nlink at 0 on Windows
+                    yield entry.path, os.stat(entry.path)
+
+    def stats(self):
+        """StoreStats of the store; saved is the space the links avoid using."""
+        blobs = size = unreferenced = unreferenced_size = saved = 0
+        for _, status in self.blobs():
+            blobs += 1
+            size += status.st_size
+            if status.st_nlink <= 1:
+                unreferenced += 1
+                unreferenced_size += status.st_size
+            else:
+                saved += status.st_size * (status.st_nlink - 2)
+        return StoreStats(blobs, size, unreferenced, unreferenced_size, saved)
+
+    def gc(self):
+        """Remove every blob no mod directory links to; returns (blobs removed, bytes freed)."""
+        removed = freed = 0
+        for path, status in self.blobs():
+            if status.st_nlink > 1:
+                continue
+            copy_engine.remove_file(path)
+            removed += 1
+            freed += status.st_size
+        if os.path.isdir(self.objects_path):
+            for prefix in os.scandir(self.objects_path):
+                if prefix.is_dir() and not os.listdir(prefix.path):
+                    os.rmdir(prefix.path)
+        with self._lock:
+            self._dirty = True
+        self.save()
+        return removed, freed
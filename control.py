@@ -0,0 +1,224 @@
+"""DDLC Mod Installer Install Control
+
+Lets a running install be paused, resumed, cancelled and slowed down from
+another thread. install_mod activates an InstallControl for the install;
+every copy and extraction loop calls checkpoint(bytes) between chunks of at
+most a few MB, which
+
+- raises InstallCancelled once cancel() has been called,
+- blocks while the install is paused,
+- and waits for a token bucket to allow the bytes about to be written.
+
+The active control is held in a context variable, like the tracer, so
+tracing.submit carries it into worker threads. All waits are sliced into
+short naps, so a cancel or a new rate takes effect within WAIT_SLICE.
+
+With low_priority set, every thread that reaches a checkpoint lowers its own
+CPU and I/O priority (background mode on Windows, nice and the idle I/O
+class on Linux), leaving the rest of the app and the machine responsive.
+Worker threads end with the install's pools. The thread that activated the
+install gets its priority back when activate exits; since Linux only lets a
+thread raise its nice value again with privileges, that thread keeps its
+nice value there unless it could restore it.
+"""
+import os
+import sys
+import time
+import ctypes
+import platform
+import threading
+import contextvars
+from collections import namedtuple
+from contextlib import contextmanager
+
+WAIT_SLICE = 0.1
+# The bucket holds this many seconds of transfer, so short bursts are not slowed
+BURST_SECONDS = 0.5
+LOW_NICE = 10
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'amd64': 251, 'aarch64': 30, 'arm64': 30, 'i386': 289, 'i686': 289}
+IOPRIO_GET_SYSCALLS = {'x86_64': 252, 'amd64': 252, 'aarch64': 31, 'arm64': 31, 'i386': 290, 'i686': 290}
+
+# What lower_thread_priority changed, for restore_thread_priority to put back
+SavedPriority = namedtuple('SavedPriority', ['background', 'nice', 'ioprio'])
+
+_current = contextvars.ContextVar('ddmi_control', default=None)
+_lowered = threading.local()
+
+
+class InstallCancelled(Exception):
+    """Raised at the next checkpoint of an install whose control was cancelled."""
+
+
+class TokenBucket:
+    """A rate limit in bytes per second that can be changed while it is in use."""
+
+    def __init__(self, rate=None):
+        self._lock = threading.Lock()
+        self.rate = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        # Bumped by set_rate, so threads already waiting on the old rate recalculate
+        self.generation = 0
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Allow rate bytes per second from now on; None or 0 lifts the limit."""
+        with self._lock:
+            self.rate = rate or None
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+            self.generation += 1
+
+    def reserve(self, size):
+        """Take size bytes from the bucket; returns how long to wait before using them."""
+        with self._lock:
+            if self.rate is None:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.rate * BURST_SECONDS, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= size
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class InstallControl:
+    """Cancel and pause switches, a rate limit and a priority setting for one install."""
+
+    def __init__(self, rate=None, low_priority=False, bucket=None):
+        # Controls can share a bucket, so that one limit covers several installs
+        self.bucket = bucket if bucket is not None else TokenBucket(rate)
+        self.low_priority = low_priority
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()  # A paused install has to wake up to notice
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def set_rate(self, rate):
+        """Change the bytes per second limit of the running install; None or 0 lifts it."""
+        self.bucket.set_rate(rate)
+
+    def checkpoint(self, size=0):
+        """Stop, pause or throttle the calling thread before it moves size more bytes."""
+        if self.low_priority and getattr(_lowered, 'saved', None) is None:
+            # Only the thread that activated the install outlives it
+            _lowered.saved = lower_thread_priority(restorable=getattr(_lowered, 'activations', 0) > 0)
+        while not self._running.wait(WAIT_SLICE):
+            pass
+        if self.cancelled:
+            raise InstallCancelled("The install was cancelled.")
+        if not size:
+            return
+        generation = self.bucket.generation
+        delay = self.bucket.reserve(size)
+        while delay > 0:
+            time.sleep(min(delay, WAIT_SLICE))
+            delay -= WAIT_SLICE
+            if self.cancelled:
+                raise InstallCancelled("The install was cancelled.")
+            if self.bucket.generation != generation:
+                # The rate changed while waiting; wait for the new one instead
+                generation = self.bucket.generation
+                delay = self.bucket.reserve(size)
+
+
+def _ioprio(syscalls, *args):
+    """ioprio_get or ioprio_set for the calling thread; -1 where the syscall is unknown."""
+    number = syscalls.get(platform.machine().lower())
+    if number is None:
+        return -1
+    return ctypes.CDLL(None, use_errno=True).syscall(number, IOPRIO_WHO_PROCESS, 0, *args)
+
+def _can_raise_nice(nice):
+    """True if the calling thread may go back to nice after being lowered to LOW_NICE."""
+    import resource
+    limit = resource.getrlimit(resource.RLIMIT_NICE)[0]
+    return os.geteuid() == 0 or limit == resource.RLIM_INFINITY or 20 - nice <= limit
+
+def lower_thread_priority(restorable=False):
+    """Lower the CPU and I/O priority of the calling thread, where the platform allows it.
+
+    Returns a SavedPriority for restore_thread_priority. With restorable set,
+    a change the thread could not undo later is skipped.
+    """
+    background = False
+    nice = ioprio = None
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            background = bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+        elif sys.platform.startswith('linux'):
+            # Linux keeps a nice value per thread, so this leaves the other threads alone
+            thread_id = threading.get_native_id()
+            previous = os.getpriority(os.PRIO_PROCESS, thread_id)
+            if previous < LOW_NICE and (not restorable or _can_raise_nice(previous)):
+                os.setpriority(os.PRIO_PROCESS, thread_id, LOW_NICE)
+                nice = previous
+            previous = _ioprio(IOPRIO_GET_SYSCALLS)
+            if previous >= 0 and _ioprio(IOPRIO_SET_SYSCALLS, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0:
+                ioprio = previous
+    except (OSError, AttributeError, ImportError):
+        pass  # Only a courtesy to the rest of the machine
+    return SavedPriority(background, nice, ioprio)
+
+def restore_thread_priority(saved):
+    """Undo lower_thread_priority; must run in the thread that called it."""
+    try:
+        if saved.background:
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_END)
+        if saved.nice is not None:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), saved.nice)
+        if saved.ioprio is not None:
+            _ioprio(IOPRIO_SET_SYSCALLS, saved.ioprio)
+    except (OSError, AttributeError):
+        pass
+
+def current():
+    """The InstallControl of the running install, or None."""
+    return _current.get()
+
+def checkpoint(size=0):
+    """InstallControl.checkpoint of the running install; does nothing outside one."""
+    active = _current.get()
+    if active is not None:
+        active.checkpoint(size)
+
+@contextmanager
+def activate(install_control):
+    """Make install_control the one checkpoint() consults in this context.
+
+    A priority the block lowered in this thread is restored when it exits.
+    """
+    token = _current.set(install_control)
+    outer = getattr(_lowered, 'saved', None)
+    _lowered.activations = getattr(_lowered, 'activations', 0) + 1
+    try:
+        yield install_control
+    finally:
+        _current.reset(token)
+        _lowered.activations -= 1
+        if outer is None and getattr(_lowered, 'saved', None) is not None:
+            restore_thread_priority(_lowered.saved)
+            _lowered.saved = None
@@ -0,0 +1,231 @@
+"""DDLC Mod Installer Copy Engine"""
+import os
+import sys
+import stat
+import errno
+import shutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import tracing
+import control
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+# Copying, reading and deleting files are I/O bound, so a few workers per core keep the SSD queue busy
+DEFAULT_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+USERSPACE_BUFFER_SIZE = 8 * 1024 * 1024
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+# CreateFileW and SetFileInformationByHandle(FileDispositionInfoEx) constants
+DELETE_ACCESS = 0x00010000
+FILE_SHARE_ALL = 0x7
+OPEN_EXISTING = 3
+FILE_FLAG_OPEN_REPARSE_POINT = 0x00200000
+FILE_DISPOSITION_INFO_EX = 21
+# DELETE | POSIX_SEMANTICS | IGNORE_READONLY_ATTRIBUTE
+FILE_DISPOSITION_FLAGS = 0x1 | 0x2 | 0x10
+
+# Errors that mean "this strategy does not work here", as opposed to real I/O failures
+FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EBADF,
+    errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+    }
+
+USERSPACE = 'userspace'
+
+CopyJob = namedtuple('CopyJob', ['src', 'dst', 'size'])
+
+# (strategy, src device, dst device) combinations that already failed once
+_unsupported = set()
+
+
+def _reflink(fsrc, fdst, size):
+    """Clone the source extents into the destination (btrfs, XFS and other CoW filesystems)."""
+    control.checkpoint()  # Cloning writes no data, so it is not throttled
+    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+def _copy_file_range(fsrc, fdst, size):
+    """Let the kernel copy the data between the two files."""
+    copied = 0
+    while copied < size:
+        # Bounded chunks keep the copy responsive to control checkpoints
+        chunk = min(size - copied, USERSPACE_BUFFER_SIZE)
+        control.checkpoint(chunk)
+        count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), chunk)
+        if count == 0:
+            break
+        copied += count
+
+def _sendfile(fsrc, fdst, size):
+    """Copy through the kernel page cache without a userspace buffer."""
+    copied = 0
+    while copied < size:
+        chunk = min(size - copied, USERSPACE_BUFFER_SIZE)
+        control.checkpoint(chunk)
+        count = os.sendfile(fdst.fileno(), fsrc.fileno(), copied, chunk)
+        if count == 0:
+            break
+        copied += count
+
+def _userspace_copy(fsrc, fdst, size):
+    """Copy through one large reusable buffer."""
+    buffer = bytearray(min(USERSPACE_BUFFER_SIZE, max(size, 1)))
+    view = memoryview(buffer)
+    while True:
+        count = fsrc.readinto(buffer)
+        if not count:
+            break
+        control.checkpoint(count)
+        fdst.write(view[:count])
+
+_linux = sys.platform.startswith('linux')
+STRATEGIES = [
+    (name, function) for name, function in (
+        ('reflink', _reflink if fcntl is not None and _linux else None),
+        ('copy_file_range', _copy_file_range if hasattr(os, 'copy_file_range') else None),
+        ('sendfile', _sendfile if hasattr(os, 'sendfile') and _linux else None),
+        (USERSPACE, _userspace_copy),
+        )
+    if function is not None
+    ]
+
+def is_fallback(strategy):
+    """True if a file was copied through a userspace buffer although the kernel offers faster strategies."""
+    return strategy == USERSPACE and len(STRATEGIES) > 1
+
+def _delete_ignoring_read_only(path):
+    """Delete path on Windows 10 1809 or later without clearing its read-only flag; False if not possible."""
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.CreateFileW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+        wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+        ]
+    handle = kernel32.CreateFileW(path, DELETE_ACCESS, FILE_SHARE_ALL, None, OPEN_EXISTING,
+                                  FILE_FLAG_OPEN_REPARSE_POINT, None)
+    if handle in (None, wintypes.HANDLE(-1).value):
+        return False
+    try:
+        flags = wintypes.DWORD(FILE_DISPOSITION_FLAGS)
+        return bool(kernel32.SetFileInformationByHandle(
+            wintypes.HANDLE(handle), FILE_DISPOSITION_INFO_EX, ctypes.byref(flags), ctypes.sizeof(flags)))
+    finally:
+        kernel32.CloseHandle(wintypes.HANDLE(handle))
+
+def remove_file(path):
+    """os.remove that also deletes read-only files, such as links to content store blobs.
+
+    On Windows the read-only flag belongs to the file, not the link, so
+    clearing it to delete one link would leave the blob and every other link
+    writable. Windows 10 can delete the link with the flag left alone; older
+    versions fall back to clearing it.
+    """
+    try:
+        os.remove(path)
+    except PermissionError:
+        if os.name != 'nt':
+            raise
+        if not _delete_ignoring_read_only(path):
+            os.chmod(path, stat.S_IWRITE)
+            os.remove(path)
+
+def remove_tree(path):
+    """shutil.rmtree(path, ignore_errors=True) that also deletes read-only files."""
+    def retry(function, failed_path, exc_info):
+        if function in (os.remove, os.unlink):
+            try:
+                remove_file(failed_path)
+            except OSError:
+                pass
+    shutil.rmtree(path, onerror=retry)
+
+def unshare(path):
+    """Remove path if it is a hard link shared with other files, so writing it cannot change them."""
+    try:
+        if os.stat(path).st_nlink > 1:
+            remove_file(path)
+    except FileNotFoundError:
+        pass
+
+def fast_copy(src, dst):
+    """Copy src to dst with the fastest available strategy, keeping shutil.copy2 metadata.
+
+    Returns the name of the strategy that copied the data.
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    unshare(dst)
+
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        devices = (os.fstat(fsrc.fileno()).st_dev, os.fstat(fdst.fileno()).st_dev)
+        for name, strategy in STRATEGIES:
+            if (name, devices) in _unsupported:
+                continue
+            try:
+                strategy(fsrc, fdst, size)
+                break
+            except OSError as e:
+                if e.errno not in FALLBACK_ERRNOS or name == USERSPACE:
+                    raise
+                _unsupported.add((name, devices))
+                # Undo anything the failed strategy wrote before trying the next one
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+    shutil.copystat(src, dst)
+    return name
+
+
+def stop_pending(futures):
+    """Cancel the futures that have not started yet and wait for the running ones to finish."""
+    for future in futures:
+        future.cancel()
+    wait(futures)
+
+def order_jobs(jobs):
+    """Order jobs so the big .rpa archives start first and small files fill the gaps."""
+    return sorted(jobs, key=lambda job: (not job.src.lower().endswith('.rpa'), -job.size))
+
+def copy_files(jobs, on_copied=None, workers=None, copy_function=fast_copy):
+    """Copy every job on a bounded worker pool.
+
+    on_copied(job, result) is called on the calling thread as each copy
+    finishes, with whatever copy_function returned (the fast_copy strategy
+    name by default), so callers can update their progress accounting
+    without extra locking.
+    """
+    jobs = order_jobs(jobs)
+    if workers is None:
+        workers = DEFAULT_WORKERS
+
+    # Create the directories up front so workers never race each other on makedirs
+    for directory in sorted({os.path.dirname(job.dst) for job in jobs}):
+        os.makedirs(directory, exist_ok=True)
+
+    def copy(job):
+        control.checkpoint()
+        with tracing.file_span(job.dst, job.size):
+            return copy_function(job.src, job.dst)
+
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            result = copy(job)
+            if on_copied is not None:
+                on_copied(job, result)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {tracing.submit(pool, copy, job): job for job in jobs}
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if on_copied is not None:
+                    on_copied(futures[future], result)
+        except BaseException:
+            stop_pending(futures)
+            raise
@@ -1,7 +1,12 @@
 """DDMI UI"""
+import time
+STARTUP_START = time.perf_counter()  # Taken before the Qt imports so startup timings include them
 import sys
 import os
+import json
+import math
 import random
+from collections import OrderedDict
 from PySide6.QtWidgets import (
     QApplication,
     QWidget,
@@ -12,18 +17,138 @@ from PySide6.QtWidgets import (
     QFrame,
     QPushButton,
     QCheckBox,
-    QTextEdit,
+    QPlainTextEdit,
     QProgressBar,
     QHBoxLayout,
     QFileDialog,
-    QMessageBox
+    QMessageBox,
+    QSpinBox
+    )
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, QSize, QVariantAnimation, Signal
+from PySide6.QtGui import (
+    QPixmap, QPainter, QPalette, QBrush, QColor, QShortcut, QKeySequence, QImage, QImageReader
     )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPixmap, QPainter, QPalette, QBrush, QColor, QTextCursor, QShortcut, QKeySequence
 import utils
 import pathlib
+import settings
 from utils import InstallThread
-from signal_manager import signal_manager
+from queue_widget import InstallQueueWidget
+from signal_manager import signal_manager, CONSOLE_MAX_LINES
+
+BACKGROUND_FADE_MS = 400
+BACKGROUND_CACHE_SIZE = 4
+RESIZE_SETTLE_MS = 150
+
+BASE64_SVG_CHECKED = 'PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCA0NDggNTEyIj48IS0tIUZvbnQgQXdlc29tZSBGcmVlIDYuNS4xIGJ5IEBmb250YXdlc29tZSAtIGh0dHBzOi8vZm9udGF3ZXNvbWUuY29tIExpY2Vuc2UgLSBodHRwczovL2ZvbnRhd2Vzb21lLmNvbS9saWNlbnNlL2ZyZWUgQ29weXJpZ2h0IDIwMjQgRm9udGljb25zLCBJbmMuLS0+PHBhdGggZmlsbD0iI2ZmZmZmZiIgZD0iTTY0IDMyQzI4LjcgMzIgMCA2MC43IDAgOTZWNDE2YzAgMzUuMyAyOC43IDY0IDY0IDY0SDM4NGMzNS4zIDAgNjQtMjguNyA2NC02NFY5NmMwLTM1LjMtMjguNy02NC02NC02NEg2NHpNMzM3IDIwOUwyMDkgMzM3Yy05LjQgOS40LTI0LjYgOS40LTMzLjkgMGwtNjQtNjRjLTkuNC05LjQtOS40LTI0LjYgMC0zMy45czI0LjYtOS40IDMzLjkgMGw0NyA0N0wzMDMgMTc1YzkuNC05LjQgMjQuNi05LjQgMzMuOSAwczkuNCAyNC42IDAgMzMuOXoiLz48L3N2Zz4='
+BASE64_SVG_UNCHECKED = 'PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCA0NDggNTEyIj48cGF0aCBmaWxsPSIjZmZmZmZmIiBkPSJNMzg0IDgwYzguOCAwIDE2IDcuMiAxNiAxNlY0MTZjMCA4LjgtNy4yIDE2LTE2IDE2SDY0Yy04LjggMC0xNi03LjItMTYtMTZWOTZjMC04LjggNy4yLTE2IDE2LTE2SDM4NHpNNjQgMzJDMjguNyAzMiAwIDYwLjcgMCA5NlY0MTZjMCAzNS4zIDI4LjcgNjQgNjQgNjRIMzg0YzM1LjMgMCA2NC0yOC43IDY0LTY0Vjk2YzAtMzUuMy0yOC43LTY0LTY0LTY0SDY0eiIvPjwvc3ZnPg=='
+STYLESHEET = """
+    QWidget {
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        color: #fff;
+    }
+    QLabel, QPush_button, QCheckBox {
+        margin: 10px;
+    }
+    QLineEdit, QPlainTextEdit {
+        background-color: rgba(30,30,30,220);
+        color: #fff;
+        border-radius: 5px;
+        padding: 10px;
+        border: 1px solid #777;
+    }
+    QPushButton {
+        background-color: #007bff;
+        color: white;
+        border-radius: 5px;
+        padding: 10px 15px;
+        border: none;
+    }
+    QPushButton:hover {
+        background-color: #0056b3;
+    }
+    QProgressBar {
+        border: 2px solid #2196F3;
+        border-radius: 5px;
+        text-align: center;
+    }
+    QProgressBar::chunk {
+        background-color: #2196F3;
+        width: 20px; /* Used to demonstrate chunk effect */
+    }
+    QCheckBox::indicator {
+        width: 25px;
+        height: 25px;
+    }
+    QCheckBox::indicator:checked {
+        image: url(./assets/ui/checked.svg);
+    }
+    QCheckBox::indicator:unchecked {
+        image: url(./assets/ui/unchecked.svg);
+    }
+    """
+#QCheckBox::indicator:checked {
+#        image: url(data:image/svg+xml;base64,{BASE64_SVG_CHECKED});
+#    }
+#    QCheckBox::indicator:unchecked {
+#        image: url(data:image/svg+xml;base64,{BASE64_SVG_UNCHECKED});
+#    }
+
+def log_startup_timing(stage):
+    """Report how long after launch a startup stage was reached.
+
+    Set DDMI_STARTUP_LOG to a file path to also append the timing there as a
+    JSON line, so time-to-first-paint can be compared between releases.
+    """
+    elapsed_ms = (time.perf_counter() - STARTUP_START) * 1000
+    signal_manager.log(f"Startup: {stage} after {elapsed_ms:.0f} ms")
+    log_path = os.environ.get("DDMI_STARTUP_LOG")
+    if log_path:
+        try:
+            with open(log_path, 'a', encoding='utf-8') as log_file:
+                log_file.write(json.dumps({"stage": stage, "ms": round(elapsed_ms, 1), "time": time.time()}) + "\n")
+        except OSError:
+            pass
+
+class BackgroundSignals(QObject):
+    loaded = Signal(QImage, int)
+
+class BackgroundLoader(QRunnable):
+    """Pick and decode a random background off the GUI thread.
+
+    The image is decoded straight to a size that still covers target_size, so
+    large PNGs never get decoded at full resolution.
+    """
+    def __init__(self, signals, generation, target_size):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.target_size = target_size
+
+    def run(self):
+        try:
+            plib = pathlib.Path(__file__).parent / "assets" / "backgrounds"
+            background_images = [file for file in plib.iterdir() if file.suffix in (".png", ".jpg", ".jpeg")]
+        except OSError:
+            background_images = []
+        if not background_images:
+            print("No image found or the 'backgrounds' directory is missing.")
+            return
+
+        reader = QImageReader(str(random.choice(background_images)))
+        image_size = reader.size()
+        if image_size.isValid() and not self.target_size.isEmpty():
+            scale = max(
+                self.target_size.width() / image_size.width(),
+                self.target_size.height() / image_size.height())
+            if scale < 1:
+                reader.setScaledSize(QSize(
+                    math.ceil(image_size.width() * scale),
+                    math.ceil(image_size.height() * scale)))
+        image = reader.read()
+        if image.isNull():
+            print(f"Could not load background image: {reader.errorString()}")
+            return
+        self.signals.loaded.emit(image, self.generation)
 
 class DimmingOverlay(QWidget):
     def __init__(self, parent=None):
@@ -36,11 +161,28 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.backgroundPixmap = None
+        self.backgroundOpacity = 1.0
+        self.backgroundGeneration = 0
+        self.firstPaintDone = False
+        self.backgroundSignals = BackgroundSignals(self)
+        self.backgroundSignals.loaded.connect(self.on_background_loaded)
+        self.backgroundFade = QVariantAnimation(self)
+        self.backgroundFade.setStartValue(0.0)
+        self.backgroundFade.setEndValue(1.0)
+        self.backgroundFade.setDuration(BACKGROUND_FADE_MS)
+        self.backgroundFade.valueChanged.connect(self.set_background_opacity)
+        # Scaled copies of the background keyed by (image, width, height, smooth), least recently used first
+        self.scaledBackgrounds = OrderedDict()
+        self.resizeSettleTimer = QTimer(self)
+        self.resizeSettleTimer.setSingleShot(True)
+        self.resizeSettleTimer.setInterval(RESIZE_SETTLE_MS)
+        self.resizeSettleTimer.timeout.connect(self.update)
         self.init_ui()
         signal_manager.console_update.connect(self.append_to_console)
         signal_manager.progress_update.connect(self.update_progress_bar)
         signal_manager.critical_messagebox.connect(self.critical_messagebox)
         signal_manager.info_messagebox.connect(self.info_messagebox)
+        signal_manager.start_flushing()
 
     def init_ui(self):
         """Initialize ui for the app"""
@@ -53,7 +195,9 @@ class MainWindow(QMainWindow):
         # self.backgroundWidget = BackgroundWidget(self)
         # self.setCentralWidget(self.backgroundWidget)
         # self.loadRandomBackground()
-        self.loadRandomBackground()
+        # Decode the background once the event loop runs, so the window shows first
+        QTimer.singleShot(0, self.loadRandomBackground)
+        QTimer.singleShot(0, lambda: utils.resume_pending_purges(self))
         # Set a dummy central widget and apply the layout to it
 
 
@@ -120,20 +264,62 @@ class MainWindow(QMainWindow):
         self.mod_path_group.addWidget(self.mod_path_browse_button)
         layout.addLayout(self.mod_path_group)
 
+        # Link the game files from the shared store instead of copying them (Initially Hidden)
+        self.store_checkbox = QCheckBox("Share Game Files Between Mod Directories")
+        self.store_checkbox.setChecked(settings.use_store())
+        self.store_checkbox.setToolTip(
+            "Game files are hard linked, so every mod directory shares one read-only copy of each.\n"
+            "Editing a game file in one directory in place (for example after clearing its\n"
+            "read-only flag) changes it in every directory that shares it.")
+        layout.addWidget(self.store_checkbox)
+
         self.mod_path_label.setVisible(False)
         self.mod_path_entry.setVisible(False)
         self.mod_path_browse_button.setVisible(False)
+        self.store_checkbox.setVisible(False)
 
         # _buttons for processing and deleting
         self.process_button = QPushButton("Install Mod")
+        self.queue_button = QPushButton("Add to Queue")
+        self.preview_button = QPushButton("Preview")
+        self.verify_button = QPushButton("Verify")
         self.delete_button = QPushButton("Delete DDLC")
-        layout.addWidget(self.process_button)
+        process_layout = QHBoxLayout()
+        process_layout.addWidget(self.process_button)
+        process_layout.addWidget(self.queue_button)
+        process_layout.addWidget(self.preview_button)
+        process_layout.addWidget(self.verify_button)
+        layout.addLayout(process_layout)
         layout.addWidget(self.delete_button)
 
+        # Controls for a running install; the speed limit can be changed while it runs
+        install_control_layout = QHBoxLayout()
+        speed_label = QLabel("Speed Limit (MB/s, 0 = none):")
+        self.speed_limit_spinbox = QSpinBox()
+        self.speed_limit_spinbox.setRange(0, 10000)
+        self.low_priority_checkbox = QCheckBox("Low Priority")
+        self.pause_button = QPushButton("Pause")
+        self.cancel_button = QPushButton("Cancel")
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        install_control_layout.addWidget(speed_label)
+        install_control_layout.addWidget(self.speed_limit_spinbox)
+        install_control_layout.addWidget(self.low_priority_checkbox)
+        install_control_layout.addWidget(self.pause_button)
+        install_control_layout.addWidget(self.cancel_button)
+        layout.addLayout(install_control_layout)
+        self.install_control = None
+
+        # Queued installs run in the background, each with its own progress row and log
+        self.queue_widget = InstallQueueWidget(self)
+        layout.addWidget(self.queue_widget)
+
         # Console Output
         console_label = QLabel("Console Output:")
-        self.console_output = QTextEdit()
+        self.console_output = QPlainTextEdit()
         self.console_output.setReadOnly(True)
+        # Keep the log bounded so long installs don't slow down the GUI thread
+        self.console_output.setMaximumBlockCount(CONSOLE_MAX_LINES)
         layout.addWidget(console_label)
         layout.addWidget(self.console_output)
 
@@ -150,21 +336,23 @@ class MainWindow(QMainWindow):
         self.newdir_checkbox.stateChanged.connect(lambda state: utils.check_changed(state, self))
         self.mod_path_browse_button.clicked.connect(lambda: self.browse_path(self.mod_path_entry, True))
         self.process_button.clicked.connect(lambda: self.on_button_click())
+        self.queue_button.clicked.connect(lambda: self.on_queue_click())
+        self.preview_button.clicked.connect(lambda: self.on_preview_click())
+        self.verify_button.clicked.connect(lambda: utils.verify_installation(
+            self.zip_entry.text(),
+            self.mod_path_entry.text() if self.newdir_checkbox.isChecked() else self.game_path_entry.text(),
+            self))
         self.delete_button.clicked.connect(lambda: utils.delete_ddlc(self.game_path_entry.text(), self))
+        self.speed_limit_spinbox.valueChanged.connect(lambda value: self.on_speed_limit_changed(value))
+        self.pause_button.clicked.connect(lambda: self.on_pause_click())
+        self.cancel_button.clicked.connect(lambda: self.on_cancel_click())
 
     def update_progress_bar(self, value):
-        self.progress_bar.setValue(value)
-        QApplication.processEvents()
+        self.progress_bar.setValue(int(value))
 
     def append_to_console(self, message):
-        self.console_output.setReadOnly(False)
-        self.console_output.append(message)
-        # Ensure the cursor is at the end and the view scrolls to the bottom
-        cursor = self.console_output.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.console_output.setTextCursor(cursor)
-        self.console_output.setReadOnly(True)
-        QApplication.processEvents()
+        # appendPlainText keeps the view pinned to the bottom while it is scrolled there
+        self.console_output.appendPlainText(message)
 
     def on_button_click(self):
         print("button clicked")
@@ -182,40 +370,122 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", "Please specify the mod directory.")
             return
 
+        # A queued job in the same directories would clobber this install's journal and backups
+        if utils.queue_conflict(
+                self, "install", writes=[mod_path or game_path], reads=[game_path] if mod_path else []):
+            return
+
         QApplication.setOverrideCursor(Qt.WaitCursor)
         utils.show_progressbar(self)
         utils.disable_ui_elements(self)
 
+        from control import InstallControl  # Only needed once an install starts
+        self.install_control = InstallControl(
+            self.speed_limit_spinbox.value() * 1024 * 1024, self.low_priority_checkbox.isChecked())
+        self.pause_button.setEnabled(True)
+        self.cancel_button.setEnabled(True)
+
         # Initialize and start the installation thread
-        self.install_thread = InstallThread(zip_path, game_path, mod_path, self)
+        self.install_thread = InstallThread(
+            zip_path, game_path, mod_path, self, self.store_checkbox.isChecked(), self.install_control)
         self.install_thread.finished.connect(self.thread_finished)
         self.install_thread.start()
 
+    def on_preview_click(self):
+        """Show what installing the mod would do, without extracting anything."""
+        zip_path = self.zip_entry.text()
+        game_path = self.game_path_entry.text()
+        mod_path = self.mod_path_entry.text() if self.newdir_checkbox.isChecked() else None
+
+        if not zip_path or not game_path:
+            QMessageBox.critical(self, "Error", "Please specify both the ZIP file and the game directory.")
+            return
+
+        utils.preview_install(zip_path, game_path, mod_path, self)
+
+    def on_queue_click(self):
+        """Add the selected mod and directories to the install queue."""
+        zip_path = self.zip_entry.text()
+        game_path = self.game_path_entry.text()
+        mod_path = self.mod_path_entry.text() if self.newdir_checkbox.isChecked() else None
+
+        if not zip_path or not game_path:
+            QMessageBox.critical(self, "Error", "Please specify both the ZIP file and the game directory.")
+            return
+
+        if self.newdir_checkbox.isChecked() and not mod_path:
+            QMessageBox.critical(self, "Error", "Please specify the mod directory.")
+            return
+
+        self.queue_widget.add_job(
+            zip_path, game_path, mod_path, self.store_checkbox.isChecked(), self.low_priority_checkbox.isChecked())
+
+    def on_speed_limit_changed(self, value):
+        if self.install_control is not None:
+            self.install_control.set_rate(value * 1024 * 1024)
+        self.queue_widget.set_rate(value * 1024 * 1024)
+
+    def on_pause_click(self):
+        if self.install_control is None:
+            return
+        if self.install_control.paused:
+            self.install_control.resume()
+            self.pause_button.setText("Pause")
+            self.append_to_console("Install resumed.")
+        else:
+            self.install_control.pause()
+            self.pause_button.setText("Resume")
+            self.append_to_console("Install paused.")
+
+    def on_cancel_click(self):
+        if self.install_control is not None:
+            self.install_control.cancel()
+            self.cancel_button.setEnabled(False)
+            self.append_to_console("Cancelling the install...")
+
     def thread_finished(self):
         # Called when the thread finishes
+        self.install_control = None
+        self.pause_button.setText("Pause")
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        signal_manager.flush()
         QApplication.restoreOverrideCursor()
         utils.enable_ui_elements(self)
 
     def loadRandomBackground(self):
-        try:
-            plib = pathlib.Path(__file__).parent / "assets" / "backgrounds"
-            background_images = [file for file in plib.iterdir() if file.suffix in (".png", ".jpg", ".jpeg")]
-            random_image_path = random.choice(background_images) if background_images else None
-            if random_image_path:
-                self.backgroundPixmap = QPixmap(random_image_path)
-                self.update()  # Trigger a repaint to show the new background
-            else:
-                print("No image found or the 'backgrounds' directory is missing.")
-        except Exception:
-            print("No image found or the 'backgrounds' directory is missing.")
+        # Decode for the whole screen so maximising later doesn't upscale a small image
+        screen = self.screen()
+        target_size = screen.size() * screen.devicePixelRatio() if screen is not None else self.size()
+        self.backgroundGeneration += 1
+        QThreadPool.globalInstance().start(
+            BackgroundLoader(self.backgroundSignals, self.backgroundGeneration, target_size))
+
+    def on_background_loaded(self, image, generation):
+        if generation != self.backgroundGeneration:
+            return  # A newer reload is already on its way
+        first_background = self.backgroundPixmap is None
+        self.backgroundPixmap = QPixmap.fromImage(image)
+        self.scaledBackgrounds.clear()
+        self.backgroundFade.start()
+        if first_background:
+            log_startup_timing("background ready")
+
+    def set_background_opacity(self, value):
+        self.backgroundOpacity = value
+        self.update()  # Trigger a repaint to show the new background
 
     def paintEvent(self, event):
+        if not self.firstPaintDone:
+            self.firstPaintDone = True
+            QTimer.singleShot(0, lambda: log_startup_timing("first paint"))
         if self.backgroundPixmap and not self.backgroundPixmap.isNull():
             painter = QPainter(self)
             painter.setRenderHint(QPainter.Antialiasing)
+            painter.setOpacity(self.backgroundOpacity)
 
             # Calculate the scaled pixmap size while maintaining aspect ratio
-            scaledPixmap = self.backgroundPixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+            scaledPixmap = self.scaled_background()
 
             # Calculate top-left coordinates to center the pixmap in the window
             startX = (self.width() - scaledPixmap.width()) / 2
@@ -224,7 +494,28 @@ class MainWindow(QMainWindow):
             # Draw the pixmap at the calculated position
             painter.drawPixmap(startX, startY, scaledPixmap) # type: ignore
 
+    def scaled_background(self):
+        """The background scaled to cover the window, rescaled only when the size or image changes.
+
+        While a resize is in progress a fast transformation is used; the smooth
+        rescale happens once the size has settled.
+        """
+        smooth = not self.resizeSettleTimer.isActive()
+        key = (self.backgroundPixmap.cacheKey(), self.width(), self.height(), smooth)
+        scaledPixmap = self.scaledBackgrounds.get(key)
+        if scaledPixmap is None:
+            mode = Qt.SmoothTransformation if smooth else Qt.FastTransformation
+            scaledPixmap = self.backgroundPixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, mode)
+            self.scaledBackgrounds[key] = scaledPixmap
+            if len(self.scaledBackgrounds) > BACKGROUND_CACHE_SIZE:
+                self.scaledBackgrounds.popitem(last=False)
+        else:
+            self.scaledBackgrounds.move_to_end(key)
+        return scaledPixmap
+
     def resizeEvent(self, event):
+        # Repaint with a smooth rescale once the user stops resizing
+        self.resizeSettleTimer.start()
         #if self.backgroundWidget:
         #    self.backgroundWidget.resize(event.size())
         # Resize the overlay widget to fill the entire window
@@ -314,60 +605,7 @@ class MainWindow(QMainWindow):
         """Applies styles to application"""
         # unchecked = (pathlib.Path(__file__).parent / "assets" / "ui" / "unchecked.svg").resolve()
         # checked = (pathlib.Path(__file__).parent / "assets" / "ui" / "checked.svg").resolve()
-        base64_svg_checked = 'PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCA0NDggNTEyIj48IS0tIUZvbnQgQXdlc29tZSBGcmVlIDYuNS4xIGJ5IEBmb250YXdlc29tZSAtIGh0dHBzOi8vZm9udGF3ZXNvbWUuY29tIExpY2Vuc2UgLSBodHRwczovL2ZvbnRhd2Vzb21lLmNvbS9saWNlbnNlL2ZyZWUgQ29weXJpZ2h0IDIwMjQgRm9udGljb25zLCBJbmMuLS0+PHBhdGggZmlsbD0iI2ZmZmZmZiIgZD0iTTY0IDMyQzI4LjcgMzIgMCA2MC43IDAgOTZWNDE2YzAgMzUuMyAyOC43IDY0IDY0IDY0SDM4NGMzNS4zIDAgNjQtMjguNyA2NC02NFY5NmMwLTM1LjMtMjguNy02NC02NC02NEg2NHpNMzM3IDIwOUwyMDkgMzM3Yy05LjQgOS40LTI0LjYgOS40LTMzLjkgMGwtNjQtNjRjLTkuNC05LjQtOS40LTI0LjYgMC0zMy45czI0LjYtOS40IDMzLjkgMGw0NyA0N0wzMDMgMTc1YzkuNC05LjQgMjQuNi05LjQgMzMuOSAwczkuNCAyNC42IDAgMzMuOXoiLz48L3N2Zz4='  # Your base64-encoded SVG string for the checked state
-        base64_svg_unchecked = 'PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHZpZXdCb3g9IjAgMCA0NDggNTEyIj48cGF0aCBmaWxsPSIjZmZmZmZmIiBkPSJNMzg0IDgwYzguOCAwIDE2IDcuMiAxNiAxNlY0MTZjMCA4LjgtNy4yIDE2LTE2IDE2SDY0Yy04LjggMC0xNi03LjItMTYtMTZWOTZjMC04LjggNy4yLTE2IDE2LTE2SDM4NHpNNjQgMzJDMjguNyAzMiAwIDYwLjcgMCA5NlY0MTZjMCAzNS4zIDI4LjcgNjQgNjQgNjRIMzg0YzM1LjMgMCA2NC0yOC43IDY0LTY0Vjk2YzAtMzUuMy0yOC43LTY0LTY0LTY0SDY0eiIvPjwvc3ZnPg=='
-        stylesheet = f"""
-            QWidget {{
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                color: #fff;
-            }}
-            QLabel, QPush_button, QCheckBox {{
-                margin: 10px;
-            }}
-            QLineEdit, QTextEdit {{
-                background-color: rgba(30,30,30,220);
-                color: #fff;
-                border-radius: 5px;
-                padding: 10px;
-                border: 1px solid #777;
-            }}
-            QPushButton {{
-                background-color: #007bff;
-                color: white;
-                border-radius: 5px;
-                padding: 10px 15px;
-                border: none;
-            }}
-            QPushButton:hover {{
-                background-color: #0056b3;
-            }}
-            QProgressBar {{
-                border: 2px solid #2196F3;
-                border-radius: 5px;
-                text-align: center;
-            }}
-            QProgressBar::chunk {{
-                background-color: #2196F3;
-                width: 20px; /* Used to demonstrate chunk effect */
-            }}
-            QCheckBox::indicator {{
-                width: 25px;
-                height: 25px;
-            }}
-            QCheckBox::indicator:checked {{
-                image: url(./assets/ui/checked.svg);
-            }}
-            QCheckBox::indicator:unchecked {{
-                image: url(./assets/ui/unchecked.svg);
-            }}
-        """
-        #QCheckBox::indicator:checked {{
-        #        image: url(data:image/svg+xml;base64,{base64_svg_checked});
-        #    }}
-        #    QCheckBox::indicator:unchecked {{
-        #        image: url(data:image/svg+xml;base64,{base64_svg_unchecked});
-        #    }}
-        self.setStyleSheet(stylesheet)
+        self.setStyleSheet(STYLESHEET)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
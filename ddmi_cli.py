@@ -0,0 +1,267 @@
+"""DDMI Command Line
+
+Headless front end to the install engine, for build machines without a GUI:
+
+    python ddmi_cli.py install MOD.zip GAME_DIR [--target DIR] [--store] [--limit-rate MB] [--low-priority]
+    python ddmi_cli.py plan MOD.zip GAME_DIR [--target DIR]
+    python ddmi_cli.py batch JOBS.json [--jobs N] [--log-dir DIR] [--store] [--limit-rate MB] [--low-priority]
+    python ddmi_cli.py purge
+    python ddmi_cli.py rollback DIR
+    python ddmi_cli.py verify MOD.zip DIR [--workers N]
+    python ddmi_cli.py cache {list,prune,clear} [--limit BYTES]
+    python ddmi_cli.py rpa GAME_DIR MOD.zip [MOD.zip ...]
+    python ddmi_cli.py store {stats,gc}
+
+A batch manifest is a JSON list of {"zip": ..., "game_path": ..., "target_dir": ...}
+objects; target_dir may be omitted to install into game_path itself. Jobs
+whose directories overlap run one after another, in manifest order.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import installer
+from control import InstallControl
+from install_queue import normalize_path, paths_conflict
+from planner import plan_install
+from reporting import StreamReporter
+
+
+def load_jobs(manifest_path):
+    """Read and validate a batch manifest."""
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        jobs = json.load(file)
+    if not isinstance(jobs, list):
+        raise ValueError("The batch manifest must be a JSON list of jobs.")
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict) or not job.get('zip') or not job.get('game_path'):
+            raise ValueError(f"Job {index} needs at least 'zip' and 'game_path'.")
+    return jobs
+
+def job_paths(job):
+    """(directories written, directories read) by a batch job, as install_queue compares them."""
+    if job.get('target_dir'):
+        return {normalize_path(job['target_dir'])}, {normalize_path(job['game_path'])}
+    return {normalize_path(job['game_path'])}, set()
+
+def run_job(index, job, log_dir, workers=None, use_store=None, rate=None, low_priority=False):
+    """Install one batch job, logging to its own file. Runs in a worker process."""
+    log_path = os.path.join(log_dir, f"job-{index:03d}.log")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        reporter = StreamReporter(log_file)
+        try:
+            installer.install_mod(
+                job['zip'], job['game_path'], job.get('target_dir') or None,
+                workers=workers, reporter=reporter, use_store=use_store,
+                install_control=InstallControl(rate, low_priority))
+            error = None
+        except Exception as e:
+            reporter.log(f"Error during processing: {e}")
+            error = str(e)
+    return index, error, time.perf_counter() - start, log_path
+
+def run_batch(jobs, processes=None, log_dir='ddmi-logs', workers=None, out=sys.stdout, use_store=None, rate=None,
+              low_priority=False):
+    """Run every job in a process pool. Returns the number of failed jobs.
+
+    A job only starts once every earlier job it conflicts with (one writes
+    where the other writes or copies the game from) has finished.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    failed = 0
+    paths = [job_paths(job) for job in jobs]
+    waiting = list(range(len(jobs)))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        running = {}
+
+        def start_ready():
+            for index in list(waiting):
+                earlier = [other for other in waiting if other < index] + list(running.values())
+                if not any(paths_conflict(paths[index], paths[other]) for other in earlier):
+                    waiting.remove(index)
+                    future = pool.submit(run_job, index, jobs[index], log_dir, workers, use_store, rate, low_priority)
+                    running[future] = index
+
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+            start_ready()
+            for future in done:
+                index, error, elapsed, log_path = future.result()
+                status = "FAILED" if error else "ok"
+                out.write(f"[{index:03d}] {status} in {elapsed:.1f}s: {jobs[index]['zip']} -> "
+                          f"{jobs[index].get('target_dir') or jobs[index]['game_path']} ({log_path})\n")
+                if error:
+                    out.write(f"      {error}\n")
+                    failed += 1
+    out.write(f"{len(jobs) - failed}/{len(jobs)} jobs succeeded.\n")
+    return failed
+
+def run_cache_command(action, limit=None, out=sys.stdout):
+    """List, prune or clear the extraction cache."""
+    import extract_cache
+    from planner import format_size
+    from settings import cache_dir, cache_limit
+    if action == 'list':
+        cached = extract_cache.entries()
+        for entry in reversed(cached):
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.last_used))
+            out.write(f"{entry.key}  {format_size(entry.size):>10}  {entry.files:>6} files  "
+                      f"used {last_used}  {entry.source}\n")
+        total = sum(entry.size for entry in cached)
+        out.write(f"{len(cached)} archives, {format_size(total)} of {format_size(cache_limit())} in {cache_dir()}\n")
+        return 0
+    evicted = extract_cache.prune(0 if action == 'clear' else limit)
+    for entry in evicted:
+        out.write(f"Removed {entry.key} ({format_size(entry.size)}): {entry.source}\n")
+    out.write(f"Removed {len(evicted)} archives.\n")
+    return 0
+
+def run_store_command(action, out=sys.stdout):
+    """Show the shared game file store's usage, or remove blobs no mod directory uses."""
+    from content_store import ContentStore
+    from planner import format_size
+    store = ContentStore()
+    if action == 'gc':
+        removed, freed = store.gc()
+        out.write(f"Removed {removed} unreferenced blobs ({format_size(freed)}) from {store.path}\n")
+        return 0
+    stats = store.stats()
+    out.write(f"{stats.blobs} blobs, {format_size(stats.size)} in {store.path}\n")
+    out.write(f"{stats.unreferenced} unreferenced ({format_size(stats.unreferenced_size)}), "
+              f"{format_size(stats.saved)} saved by hard links\n")
+    return 0
+
+def run_rpa_command(game_path, zip_paths, out=sys.stdout):
+    """Report how each mod's .rpa archives differ from the game's, and which members mods share."""
+    import zipfile
+    import rpa
+    mod_indexes = {}
+    for zip_path in zip_paths:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            plan = plan_install(zip_path, game_path, zip_ref=zip_ref)
+            # Unlike the Preview, this command is asked for the indexes, so it inflates deflated archives
+            lines = rpa.describe_changes(plan, zip_ref, inflate=True) or ["No .rpa archives."]
+            mod_indexes[zip_path] = rpa.plan_indexes(plan, zip_ref, inflate=True)
+        out.write(f"{zip_path}:\n")
+        for line in lines:
+            out.write(f"  {line}\n")
+    if len(zip_paths) > 1:
+        collisions = rpa.find_collisions(mod_indexes)
+        out.write(f"{len(collisions)} archive members are shipped by more than one mod.\n")
+        for name, mods in collisions.items():
+            out.write(f"  {name}: {', '.join(mods)}\n")
+    return 0
+
+def rate_limit(args):
+    """The --limit-rate of the command line in bytes per second, or None."""
+    return int(args.limit_rate * 1024 * 1024) if args.limit_rate else None
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ddmi', description="Doki Doki Mod Installer")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    install_parser = commands.add_parser('install', help="install one mod")
+    plan_parser = commands.add_parser('plan', help="show what installing a mod would do")
+    for command_parser in (install_parser, plan_parser):
+        command_parser.add_argument('zip', help="mod archive")
+        command_parser.add_argument('game_path', help="DDLC directory")
+        command_parser.add_argument('--target', help="install into a copy of the game in this directory")
+    install_parser.add_argument('--workers', type=int, help="copy and decompression threads per install")
+    # By default a --target install goes through the cache and an in-place one streams
+    route = install_parser.add_mutually_exclusive_group()
+    route.add_argument('--extract', action='store_true',
+                       help="extract through the shared extraction cache instead of streaming")
+    route.add_argument('--direct', action='store_true',
+                       help="stream members straight to a --target directory, bypassing the extraction cache")
+
+    batch_parser = commands.add_parser('batch', help="install many mods concurrently")
+    batch_parser.add_argument('manifest', help="JSON list of jobs")
+    batch_parser.add_argument('--jobs', type=int, help="installs to run at once (default: CPU count)")
+    batch_parser.add_argument('--log-dir', default='ddmi-logs', help="directory for per-job logs")
+    batch_parser.add_argument('--workers', type=int, help="copy and decompression threads per install")
+    for command_parser in (install_parser, batch_parser):
+        command_parser.add_argument('--store', action='store_true',
+                                    help="hard link the game files of --target directories from the shared store; the "
+                                         "links are read-only, and editing one in place changes it in every directory")
+        command_parser.add_argument('--limit-rate', type=float, metavar='MB',
+                                    help="write at most this many MB per second (per install)")
+        command_parser.add_argument('--low-priority', action='store_true',
+                                    help="run install threads at low CPU and I/O priority")
+
+    commands.add_parser('purge', help="finish deleting game directories left over from earlier uninstalls")
+
+    rollback_parser = commands.add_parser('rollback', help="undo an interrupted install")
+    rollback_parser.add_argument('destination', help="directory the install was writing to")
+
+    verify_parser = commands.add_parser('verify', help="check an installed mod's files against its archive")
+    verify_parser.add_argument('zip', help="mod archive the install came from")
+    verify_parser.add_argument('destination', help="directory the mod was installed into")
+    verify_parser.add_argument('--workers', type=int, help="files read at once")
+
+    cache_parser = commands.add_parser('cache', help="inspect or prune the extraction cache")
+    cache_parser.add_argument('action', choices=['list', 'prune', 'clear'])
+    cache_parser.add_argument('--limit', type=int, help="size in bytes to prune down to (default: the cache limit)")
+
+    store_parser = commands.add_parser('store', help="inspect or garbage-collect the shared game file store")
+    store_parser.add_argument('action', choices=['stats', 'gc'])
+
+    rpa_parser = commands.add_parser('rpa', help="compare the .rpa archives of mods with the game's")
+    rpa_parser.add_argument('game_path', help="DDLC directory")
+    rpa_parser.add_argument('zips', nargs='+', help="mod archives; with several, shared members are listed")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'install':
+        direct = False if args.extract else True if args.direct else None
+        try:
+            installer.install_mod(args.zip, args.game_path, args.target, direct=direct,
+                                  workers=args.workers, reporter=StreamReporter(), use_store=args.store or None,
+                                  install_control=InstallControl(rate_limit(args), args.low_priority))
+        except Exception as e:
+            print(f"Error during processing: {e}", file=sys.stderr)
+            return 1
+        return 0
+    if args.command == 'plan':
+        for line in plan_install(args.zip, args.game_path, args.target).describe():
+            print(line)
+        return 0
+    if args.command == 'batch':
+        jobs = load_jobs(args.manifest)
+        failed = run_batch(jobs, args.jobs, args.log_dir, args.workers, use_store=args.store or None,
+                           rate=rate_limit(args), low_priority=args.low_priority)
+        return 1 if failed else 0
+    if args.command == 'purge':
+        import purge
+        for tombstone in purge.pending_tombstones():
+            files, size = purge.purge_tombstone(tombstone)
+            print(f"Purged {files} files ({size / (1024 * 1024):.1f} MB) from: {tombstone}")
+        return 0
+    if args.command == 'rollback':
+        return 0 if installer.rollback_install(args.destination, StreamReporter()) else 1
+    if args.command == 'verify':
+        import verify
+        try:
+            report = verify.verify_install(args.zip, args.destination, args.workers, StreamReporter())
+        except (OSError, verify.VerifyError) as e:
+            print(f"Error during verification: {e}", file=sys.stderr)
+            return 2
+        for line in verify.describe_report(report):
+            print(line)
+        return 1 if report.failed else 0
+    if args.command == 'cache':
+        return run_cache_command(args.action, args.limit)
+    if args.command == 'store':
+        return run_store_command(args.action)
+    if args.command == 'rpa':
+        return run_rpa_command(args.game_path, args.zips)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""DDLC Mod Installer Extraction Cache
+
+Extracted mod archives are kept in one managed directory, keyed by a
+fingerprint of the archive (its size plus a hash of its central directory),
+so installing the same mod again, even into another directory, reuses the
+extracted tree instead of decompressing it again. The cache is capped in
+total size and evicts the least recently used archives first.
+
+Every cached archive is a directory holding the extracted files and an
+entry file; the entry file's mtime is the last time it was used. An
+install copying from a cached tree leaves an in-use marker in it for as
+long as it does, and pruning skips marked trees.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager
+from inventory import FileInventory
+from planner import zip_member_parts
+from settings import cache_dir, cache_limit
+from zip_members import ExtractJob, extract_members
+import tracing
+
+ENTRY_NAME = '.ddmi_cache_entry.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+STALE_TEMP_SECONDS = 3600
+IN_USE_PREFIX = '.ddmi_in_use.'
+# Markers older than this were left by an install that crashed
+STALE_IN_USE_SECONDS = 24 * 3600
+
+CacheEntry = namedtuple('CacheEntry', ['key', 'path', 'size', 'files', 'source', 'last_used'])
+
+
+def archive_key(zip_path, zip_ref=None):
+    """Fingerprint an archive from its size and a SHA-256 of its central directory."""
+    if zip_ref is None:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            return archive_key(zip_path, zip_ref)
+    size = os.path.getsize(zip_path)
+    digest = hashlib.sha256()
+    with open(zip_path, 'rb') as file:
+        # start_dir is where zipfile found the central directory; it runs to the end of the file
+        file.seek(zip_ref.start_dir)
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return f"{size:x}-{digest.hexdigest()[:32]}"
+
+def _read_entry(path):
+    entry_file = os.path.join(path, ENTRY_NAME)
+    try:
+        with open(entry_file, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        last_used = os.path.getmtime(entry_file)
+    except (OSError, ValueError):
+        return None
+    return CacheEntry(os.path.basename(path), path, data['size'], data['files'], data['source'], last_used)
+
+def entries(directory=None):
+    """Every complete cached archive, least recently used first."""
+    directory = directory or cache_dir()
+    found = []
+    with os.scandir(directory) as iterator:
+        for item in iterator:
+            if item.is_dir(follow_symlinks=False):
+                entry = _read_entry(item.path)
+                if entry is not None:
+                    found.append(entry)
+    return sorted(found, key=lambda entry: entry.last_used)
+
+@contextmanager
+def in_use(path):
+    """Mark a cached tree as being copied from while the with block runs."""
+    marker = os.path.join(path, f"{IN_USE_PREFIX}{os.getpid()}.{uuid.uuid4().hex[:8]}")
+    with open(marker, 'w', encoding='utf-8'):
+        pass
+    try:
+        yield path
+    finally:
+        try:
+            os.remove(marker)
+        except OSError:
+            pass
+
+def is_in_use(path):
+    """True if an install is copying from the cached tree at path."""
+    try:
+        with os.scandir(path) as iterator:
+            return any(
+                item.name.startswith(IN_USE_PREFIX)
+                and time.time() - item.stat().st_mtime < STALE_IN_USE_SECONDS
+                for item in iterator
+                )
+    except OSError:
+        return False
+
+def extract_all(zip_path, zip_ref, path, workers=None):
+    """Extract every member below path, inflating members in parallel.
+
+    Like ZipFile.extractall, names that would land outside path are skipped
+    and a name listed twice keeps its last entry.
+    """
+    jobs = {}
+    for info in zip_ref.infolist():
+        parts = zip_member_parts(info.filename)
+        if parts is None:
+            continue
+        dst_path = os.path.join(path, *parts)
+        if info.is_dir():
+            os.makedirs(dst_path, exist_ok=True)
+        else:
+            jobs[os.path.normcase(dst_path)] = ExtractJob(info, dst_path, info.file_size)
+    with tracing.span('extract', files=len(jobs), size=sum(job.size for job in jobs.values())):
+        report = extract_members(zip_path, list(jobs.values()), workers=workers)
+    if report.failed:
+        raise report.failed[0][1]  # Nothing half-verified goes into the cache
+
+def extract(zip_path, zip_ref=None, directory=None, limit=None, workers=None, reporter=None):
+    """Return the cached extraction of an archive, extracting it first if needed."""
+    if zip_ref is None:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            return extract(zip_path, zip_ref, directory, limit, workers, reporter)
+    directory = directory or cache_dir()
+    key = archive_key(zip_path, zip_ref)
+    path = os.path.join(directory, key)
+
+    entry = _read_entry(path)
+    if entry is not None:
+        os.utime(os.path.join(path, ENTRY_NAME))  # Mark as recently used
+        if reporter is not None:
+            reporter.log(f"Using cached extraction: {path}")
+        return path
+
+    # Extract next to the final location and rename, so a half-extracted tree is never used
+    temp_path = os.path.join(directory, f".{key}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        extract_all(zip_path, zip_ref, temp_path, workers)
+        inventory = FileInventory.scan(temp_path)
+        with open(os.path.join(temp_path, ENTRY_NAME), 'w', encoding='utf-8') as file:
+            json.dump({
+                'size': inventory.total_size,
+                'files': len(inventory.files),
+                'source': os.path.abspath(zip_path),
+                'created': time.time(),
+                }, file)
+        shutil.rmtree(path, ignore_errors=True)  # Leftover without an entry file
+        os.rename(temp_path, path)
+    except BaseException as e:
+        # Whatever stopped the extraction (a bad member, a cancel), leave nothing half-written behind
+        shutil.rmtree(temp_path, ignore_errors=True)
+        if not isinstance(e, OSError) or _read_entry(path) is None:
+            raise
+        # Another install extracted the same archive at the same time
+    if reporter is not None:
+        reporter.log(f"Extracted zip to cache: {path}")
+
+    prune(limit, directory, keep=key)
+    return path
+
+def prune(limit=None, directory=None, keep=None):
+    """Evict least recently used archives until the cache fits in limit bytes.
+
+    Archives an install is copying from are never evicted. Returns the evicted entries.
+    """
+    limit = cache_limit() if limit is None else limit
+    directory = directory or cache_dir()
+    # Half-finished extractions from installs that crashed
+    with os.scandir(directory) as iterator:
+        for item in iterator:
+            if item.name.endswith('.tmp') and time.time() - item.stat().st_mtime > STALE_TEMP_SECONDS:
+                shutil.rmtree(item.path, ignore_errors=True)
+    cached = entries(directory)
+    total = sum(entry.size for entry in cached)
+    evicted = []
+    for entry in cached:
+        if total <= limit:
+            break
+        if entry.key == keep or is_in_use(entry.path):
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+        total -= entry.size
+        evicted.append(entry)
+    return evicted
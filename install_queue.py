@@ -0,0 +1,211 @@
+"""DDLC Mod Installer Install Queue
+
+Runs a list of (mod archive, destination) jobs in the background, at most
+max_jobs at a time. A direct install inflates and writes each member in one
+go, so running jobs side by side is what lets one job's decompression
+overlap another's disk writes; the default of two keeps the disk busy
+without the jobs fighting over it. Jobs whose directories overlap (one
+writes where the other writes or copies the game from) never run at the
+same time, and otherwise start in the order they were added.
+
+Every job is its own reporter, keeping its log and progress for the GUI to
+show, and has its own control.InstallControl so it can be cancelled on its
+own. All jobs draw on one token bucket, so a speed limit applies to the
+queue as a whole.
+"""
+import os
+import time
+import threading
+from collections import deque
+import control
+from reporting import Reporter
+
+DEFAULT_MAX_JOBS = 2
+JOB_LOG_LINES = 2000
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def paths_conflict(paths, other_paths):
+    """True if two (directories written, directories read) pairs must not be used at the same time."""
+    writes, reads = paths
+    other_writes, other_reads = other_paths
+    return bool(writes & (other_writes | other_reads) or other_writes & reads)
+
+
+class QueueJob(Reporter):
+    """One queued install, with the log and progress it reports."""
+
+    def __init__(self, number, zip_path, game_path, target_dir=None, use_store=None, install_control=None):
+        self.number = number
+        self.zip_path = zip_path
+        self.game_path = game_path
+        self.target_dir = target_dir or None
+        self.use_store = use_store
+        self.control = install_control or control.InstallControl()
+        self.status = QUEUED
+        self.progress = 0.0
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+        self._log = deque(maxlen=JOB_LOG_LINES)
+        self._logged = 0
+
+    @property
+    def destination(self):
+        return self.target_dir or self.game_path
+
+    def log(self, message):
+        with self._lock:
+            self._log.append(str(message))
+            self._logged += 1
+
+    def report_progress(self, value):
+        self.progress = value
+
+    def log_since(self, count):
+        """(lines logged so far, those logged after the first count that are still kept)."""
+        with self._lock:
+            new = min(self._logged - count, len(self._log))
+            return self._logged, list(self._log)[-new:] if new > 0 else []
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def paths(self):
+        """(directories written, directories read) by this job, normalised for comparison."""
+        reads = {normalize_path(self.game_path)} if self.target_dir else set()
+        return {normalize_path(self.destination)}, reads
+
+    def conflicts_with(self, other):
+        """True if the two jobs must not run at the same time."""
+        return paths_conflict(self.paths(), other.paths())
+
+
+class InstallQueue:
+    """Schedules QueueJobs onto background threads, at most max_jobs at a time.
+
+    on_finished(job), if given, is called from the job's thread once it ends.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, workers=None, on_finished=None):
+        self.max_jobs = max(1, max_jobs)
+        self.workers = workers
+        self.on_finished = on_finished
+        self.bucket = control.TokenBucket()
+        self.jobs = []
+        self._numbers = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def add(self, zip_path, game_path, target_dir=None, use_store=None, low_priority=False):
+        """Queue an install and start it as soon as the queue allows; returns its QueueJob."""
+        with self._lock:
+            self._numbers += 1
+            job = QueueJob(self._numbers, zip_path, game_path, target_dir, use_store,
+                           control.InstallControl(low_priority=low_priority, bucket=self.bucket))
+            self.jobs.append(job)
+            self._dispatch()
+        return job
+
+    def set_max_jobs(self, max_jobs):
+        with self._lock:
+            self.max_jobs = max(1, max_jobs)
+            self._dispatch()
+
+    def set_rate(self, rate):
+        """Limit all jobs together to rate bytes per second; None or 0 lifts the limit."""
+        self.bucket.set_rate(rate)
+
+    def cancel(self, job):
+        """Cancel a job, whether it is still queued or already running."""
+        with self._lock:
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.log("Cancelled before it started.")
+                self._dispatch()  # Jobs it held back may start now
+                self._idle.notify_all()
+                return
+        job.control.cancel()
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            if job.status not in FINISHED:
+                self.cancel(job)
+
+    def clear_finished(self):
+        """Forget every job that has ended."""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status not in FINISHED]
+
+    def conflicting(self, writes=(), reads=()):
+        """Queued and running jobs that an outside action writing writes and reading reads would clash with."""
+        paths = ({normalize_path(path) for path in writes}, {normalize_path(path) for path in reads})
+        with self._lock:
+            return [
+                job for job in self.jobs
+                if job.status in (QUEUED, RUNNING) and paths_conflict(paths, job.paths())
+                ]
+
+    def pending(self):
+        with self._lock:
+            return sum(1 for job in self.jobs if job.status not in FINISHED)
+
+    def wait(self, timeout=None):
+        """Block until every job has ended; returns False if timeout ran out first."""
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: all(job.status in FINISHED for job in self.jobs), timeout)
+
+    def _dispatch(self):
+        """Start queued jobs while there is room. Called with the lock held."""
+        running = [job for job in self.jobs if job.status == RUNNING]
+        for index, job in enumerate(self.jobs):
+            if len(running) >= self.max_jobs:
+                break
+            if job.status != QUEUED:
+                continue
+            # A job waiting on a conflict also holds back later jobs that conflict with it
+            blockers = [other for other in self.jobs[:index] if other.status in (QUEUED, RUNNING)]
+            if any(job.conflicts_with(other) for other in blockers):
+                continue
+            job.status = RUNNING
+            job.started = time.monotonic()
+            running.append(job)
+            threading.Thread(target=self._run, args=(job,), name=f"ddmi-queue-{job.number}", daemon=True).start()
+
+    def _run(self, job):
+        import installer
+        job.log(f"Installing {job.zip_path} into {job.destination}")
+        try:
+            installer.install_mod(
+                job.zip_path, job.game_path, job.target_dir, workers=self.workers, reporter=job,
+                use_store=job.use_store, install_control=job.control)
+            job.report_progress(100)
+            status = DONE
+        except control.InstallCancelled:
+            job.log("Install cancelled; undoing the files it already wrote.")
+            installer.rollback_install(job.destination, job)
+            status = CANCELLED
+        except Exception as e:
+            job.log(f"Error during processing: {e}")
+            job.error = str(e)
+            status = FAILED
+        with self._lock:
+            job.status = status
+            job.finished = time.monotonic()
+            self._dispatch()
+            self._idle.notify_all()
+        if self.on_finished is not None:
+            self.on_finished(job)
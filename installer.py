@@ -0,0 +1,594 @@
+"""DDLC Mod Installer Core
+
+The install engine, free of any GUI or Windows-only imports. Progress and
+console output go to a reporting.Reporter.
+"""
+import os
+import io
+import zipfile
+from collections import Counter
+import tracing
+import control
+import settings
+import copy_engine
+import extract_cache
+import archive_sources
+from copy_engine import CopyJob
+from content_store import ContentStore
+from zip_members import ExtractJob, extract_members, describe_write_report
+from inventory import FileInventory, DIR
+from planner import plan_install, find_zip_mod_root, detect_mod_root, describe_root_detection, entry_mod_root
+from planner import classify_member, TARGET_FILES, TARGET_DIRS, EXECUTABLE_EXTENSIONS, MKDIR, WRITE, OVERWRITE, SKIP
+from reporting import NULL_REPORTER
+from journal import InstallJournal, rollback_stale
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Mod files seen before the mod root is known are held in memory up to this size
+PENDING_MEMORY_LIMIT = 256 * 1024 * 1024
+
+
+class InstallError(Exception):
+    """An install that cannot start, e.g. because the input is not a mod archive."""
+
+
+def calculate_directory_size(path):
+    """Calculate the total size of all files in the directory."""
+    return FileInventory.scan(path).total_size
+
+def calculate_total_size(zip_path):
+    """Get total size of zip"""
+    total_size = 0
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for file_info in zip_ref.infolist():
+            total_size += file_info.file_size
+    return total_size
+
+def delete_directory_with_progress(path, total_size, deleted_size=None, inventory=None, reporter=NULL_REPORTER):
+    """Delete a directory and its contents, updating the progress bar.
+
+    An existing FileInventory of path can be passed to avoid walking it again.
+    """
+    if deleted_size is None:
+        deleted_size=[0]
+    if not os.path.exists(path):
+        return
+    if inventory is None:
+        inventory = FileInventory.scan(path)
+    total_size = total_size or 1
+
+    # Contents come after their directory in the inventory, so go backwards
+    for entry in reversed(inventory.entries):
+        entry_path = inventory.abspath(entry)
+        if entry.type == DIR:
+            os.rmdir(entry_path)
+        else:
+            copy_engine.remove_file(entry_path)  # May be a read-only link into the content store
+            deleted_size[0] += entry.size
+            reporter.report_progress((deleted_size[0] / total_size) * 100)
+
+    os.rmdir(path)  # Finally, remove the root directory itself
+    reporter.report_progress(100) # Ensure it reaches 100% at the end
+
+def report_copy_strategies(strategies, reporter=NULL_REPORTER):
+    """Log how many files each fast_copy strategy handled."""
+    if strategies:
+        summary = ", ".join(f"{name}: {count} files" for name, count in strategies.most_common())
+        reporter.log(f"Copy strategies used: {summary}")
+
+def copy_with_progress(jobs, processed_size, total_size, workers=None, reporter=NULL_REPORTER,
+                       copy_function=copy_engine.fast_copy):
+    """Copy jobs with the shared copy engine, adding each finished file to processed_size.
+
+    Files the kernel could not copy are logged one by one as they fall back
+    to a userspace copy; the counts per strategy are logged at the end.
+    """
+    strategies = Counter()
+
+    def on_copied(job, strategy):
+        strategies[strategy] += 1
+        if copy_engine.is_fallback(strategy):
+            reporter.log(f"Fell back to a userspace copy: {job.dst}")
+        processed_size[0] += job.size  # Update processed size
+        progress_percentage = (processed_size[0] / total_size) * 100
+        reporter.report_progress(progress_percentage)  # Update progress bar
+
+    copy_engine.copy_files(jobs, on_copied, workers, copy_function)
+    report_copy_strategies(strategies, reporter)
+
+def merge_directories(src, dst, processed_size, destination_path, total_size, workers=None, reporter=NULL_REPORTER,
+                      install_journal=None):
+    """Merge directories from src to dst, overwriting conflicts, and update progress bar.
+
+    With an InstallJournal, every copy is journaled and the file it replaces backed up first.
+    """
+    dst = os.path.join(destination_path, dst)  # Adjust destination based on user choice
+    jobs = []
+    for root, dirs, files in os.walk(src):
+        # Calculate relative path to the source directory
+        rel_path = os.path.relpath(root, src)
+        dst_path = os.path.join(dst, rel_path)
+
+        # Ensure the destination directory exists
+        os.makedirs(dst_path, exist_ok=True)
+
+        # Queue files for copying, overwriting existing ones
+        for file in files:
+            src_file_path = os.path.join(root, file)
+            dst_file_path = os.path.join(dst_path, file)
+            if os.path.exists(dst_file_path):
+                reporter.log(f"Overwriting file: {dst_file_path}")
+            else:
+                reporter.log(f"Copying file: {dst_file_path}")
+            if install_journal is not None:
+                install_journal.begin_write(os.path.relpath(dst_file_path, destination_path))
+            jobs.append(CopyJob(src_file_path, dst_file_path, os.path.getsize(src_file_path)))
+    copy_with_progress(jobs, processed_size, total_size, workers, reporter)
+
+def overwrite_file(src, dst, processed_size, destination_path, total_size, reporter=NULL_REPORTER,
+                   install_journal=None):
+    """Overwrite the file at dst with src, within the destination path.
+
+    With an InstallJournal, the copy is journaled and the file it replaces backed up first.
+    """
+    if install_journal is not None:
+        install_journal.begin_write(dst)  # Moves the file being replaced into the backup folder
+    dst = os.path.join(destination_path, dst)  # Adjust destination path
+    file_size = os.path.getsize(src)
+    if os.path.exists(dst):
+        copy_engine.remove_file(dst)
+        reporter.log(f"Removed existing file: {dst}")
+    strategy = copy_engine.fast_copy(src, dst)
+    reporter.log(f"Copied {src} to {dst} ({strategy})")
+    processed_size[0] += file_size
+    reporter.report_progress((processed_size[0] / total_size) * 100)
+
+def is_copied(entry, dst_path):
+    """True if dst_path already holds a finished copy of the inventory entry.
+
+    fast_copy copies the mtime last, so a partly copied file never matches.
+    """
+    try:
+        stat = os.stat(dst_path)
+    except OSError:
+        return False
+    return stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime
+
+def copy_game_files(game_path, destination_path, processed_size, total_size, workers=None, inventory=None,
+                    reporter=NULL_REPORTER, skip_copied=False, store=None):
+    """Copy all game files to the destination directory and update progress.
+
+    An existing FileInventory of game_path can be passed to avoid walking it
+    again. With skip_copied set, files an earlier run already copied are
+    left alone. With a content_store.ContentStore, the files are hard linked
+    from the store instead of copied. DDMI's manifest, journal and backups
+    from installs into game_path are never copied.
+    """
+    if inventory is None:
+        inventory = FileInventory.scan(game_path)
+    jobs = []
+    for entry in inventory.without_bookkeeping().files:
+        dst_path = os.path.join(destination_path, entry.path)
+        if skip_copied and is_copied(entry, dst_path):
+            processed_size[0] += entry.size
+            continue
+        jobs.append(CopyJob(inventory.abspath(entry), dst_path, entry.size))
+
+    with tracing.span('copy game files', files=len(jobs), size=sum(job.size for job in jobs)):
+        if store is None:
+            copy_with_progress(jobs, processed_size, total_size, workers, reporter)
+        else:
+            try:
+                copy_with_progress(jobs, processed_size, total_size, workers, reporter, store.link)
+            finally:
+                store.save()
+    reporter.log(f"Copied game files to: {destination_path}")
+
+def install_mod(zip_path, game_path, separate_mod_path=None, direct=None, workers=None, reporter=NULL_REPORTER,
+                use_store=None, install_control=None):
+    """Install a mod archive into game_path, or into a copy of the game at separate_mod_path.
+
+    With direct set, the install is planned from the zip's central directory
+    and every member is decompressed once, straight to its final path.
+    Otherwise the archive is extracted into the shared extraction cache (or
+    found there from an earlier install) and the extracted tree is copied
+    into place.
+
+    Left as None, direct is chosen by destination. An install into
+    game_path goes direct: a cached tree would only be written to be copied
+    again, and reinstalling skips unchanged files through the install
+    manifest anyway. An install into a separate directory goes through the
+    cache, since the same mod going into yet another directory then copies
+    the cached tree instead of inflating the archive again.
+
+    Tar archives, and zips that only hold other archives, are installed
+    straight from a single pass over the archive with install_from_archive.
+
+    With use_store set (by default when settings.use_store() is), a
+    separate mod directory gets hard links to the game files in the shared
+    content_store instead of a full copy of the game.
+
+    An control.InstallControl pauses, throttles or cancels the
+    install from another thread; a cancelled install raises InstallCancelled
+    and leaves its journal, so it can be resumed or rolled back.
+
+    Every install is traced with the tracing module; the phase summary is
+    logged at the end.
+
+    Returns True when the mod put an executable into the destination root.
+    Raises InstallError for anything that is not a supported archive.
+    """
+    if use_store is None:
+        use_store = settings.use_store()
+    if direct is None:
+        direct = separate_mod_path is None
+    store = ContentStore() if use_store and separate_mod_path is not None else None
+    with control.activate(install_control), tracing.trace_install(zip_path, reporter):
+        return _install_mod(zip_path, game_path, separate_mod_path, direct, workers, reporter, store)
+
+def _install_mod(zip_path, game_path, separate_mod_path, direct, workers, reporter, store):
+    open_dir = False
+    reporter.log(f"Processing files from: {zip_path} to {game_path}")
+
+    extension = archive_sources.archive_extension(zip_path)
+    if extension is None:
+        raise InstallError("The provided path does not point to a zip or tar archive.")
+    streaming = extension != '.zip' or holds_only_archives(zip_path)
+    destination_path = separate_mod_path if separate_mod_path else game_path
+
+    stale = rollback_stale(zip_path, destination_path)
+    if stale is not None:
+        reporter.log(f"Rolled back {stale[1]} files of an unfinished install of {stale[0]}")
+    if streaming:
+        return install_from_archive(zip_path, game_path, separate_mod_path, workers, reporter, store)
+
+    # Initialize progress tracking
+    processed_size = [0]
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        if direct:
+            with tracing.span('plan') as span:
+                plan = plan_install(zip_path, game_path, separate_mod_path, zip_ref)
+                span.add(len(plan.file_operations), plan.mod_bytes)
+            open_dir = execute_plan(plan, processed_size, workers, reporter, store)
+        else:
+            open_dir = install_extracted(
+                zip_path, zip_ref, game_path, separate_mod_path, processed_size, workers, reporter, store)
+
+    reporter.report_progress(100)  # Ensure progress bar reaches 100% at the end
+    return open_dir
+
+def install_extracted(zip_path, zip_ref, game_path, separate_mod_path, processed_size, workers=None,
+                      reporter=NULL_REPORTER, store=None):
+    """Install a mod by extracting it into the extraction cache and copying its files from there.
+
+    The copies are added to an InstallJournal as they are made, with the
+    files they replace backed up, so an unfinished install can be rolled
+    back. Returns True when the mod put an executable into the destination root.
+    """
+    destination_path = separate_mod_path if separate_mod_path else game_path
+    # Settle the mod root from the central directory before anything is extracted
+    with tracing.span('locate mod root'):
+        detection = detect_mod_root((info.filename, info.is_dir()) for info in zip_ref.infolist())
+    if detection.root is None:
+        reporter.log("None of the target directories or files found in the zip file.")
+        return False
+    for line in describe_root_detection(detection):
+        reporter.log(line)
+    # Only a separate-directory install copies the game, so only then does it count towards progress
+    game_inventory = None
+    if separate_mod_path is not None:
+        # DDMI's files from installs into the game directory would count towards progress without being copied
+        game_inventory = FileInventory.scan(game_path).without_bookkeeping()
+    game_dir_size = game_inventory.total_size if game_inventory is not None else 0
+    mod_file_size = sum(info.file_size for info in zip_ref.infolist())
+    total_size = game_dir_size + mod_file_size
+    if not total_size:
+        total_size = 100
+
+    install_journal = InstallJournal.begin(zip_path, destination_path, [])
+    try:
+        try:
+            extract_path = extract_cache.extract(zip_path, zip_ref, workers=workers, reporter=reporter)
+        except PermissionError:
+            reporter.log("Warning: Permission denied during extraction.")
+            install_journal.commit()
+            return False
+        if separate_mod_path is not None:
+            copy_game_files(
+                game_path,
+                separate_mod_path,
+                processed_size,
+                total_size,
+                workers,
+                inventory=game_inventory,
+                reporter=reporter,
+                skip_copied=True,
+                store=store)
+        # Other installs pruning the cache meanwhile leave the tree alone
+        with extract_cache.in_use(extract_path):
+            open_dir = process_extracted_files(
+                extract_path,
+                destination_path,
+                processed_size,
+                total_size,
+                destination_path,
+                reporter,
+                mod_root=detection.root,
+                install_journal=install_journal
+                )
+    finally:
+        install_journal.close()
+    install_journal.commit()
+    return open_dir
+
+def holds_only_archives(zip_path):
+    """True if a zip has no game files of its own but does contain other archives."""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+    return find_zip_mod_root(infos) is None and any(archive_sources.is_archive(info.filename) for info in infos)
+
+def write_stream(stream, dst_path):
+    """Write a readable stream straight into dst_path."""
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    copy_engine.unshare(dst_path)
+    with open(dst_path, 'wb') as dst:
+        for chunk in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+            control.checkpoint(len(chunk))
+            dst.write(chunk)
+
+def install_from_archive(archive_path, game_path, separate_mod_path=None, workers=None, reporter=NULL_REPORTER,
+                         store=None):
+    """Install a mod while reading the archive once, front to back, with nothing unpacked to a temp folder.
+
+    Entries are classified the same way process_extracted_files sorts an
+    extracted tree. The mod root is taken from the first entry that shows
+    one; mod files listed before it are held in memory until then. Each
+    write is added to an InstallJournal as it is reached, with the file it
+    replaces backed up, so an unfinished install can be rolled back.
+    Returns True when the mod put an executable into the destination root.
+    """
+    destination_path = separate_mod_path if separate_mod_path else game_path
+    processed_size = [0]
+    game_inventory = None
+    if separate_mod_path is not None:
+        # DDMI's files from installs into the game directory would count towards progress without being copied
+        game_inventory = FileInventory.scan(game_path).without_bookkeeping()
+    game_dir_size = game_inventory.total_size if game_inventory is not None else 0
+    total_size = (game_dir_size + os.path.getsize(archive_path)) or 100
+    open_dir = False
+    mod_root = None
+    pending = []
+    pending_size = 0
+
+    def install_entry(entry, parts):
+        target = classify_member(parts[len(mod_root):], entry.is_dir)
+        if target is None:
+            return False
+        dst_path = os.path.join(destination_path, target)
+        if entry.is_dir:
+            os.makedirs(dst_path, exist_ok=True)
+            return False
+        if os.path.exists(dst_path):
+            reporter.log(f"Overwriting file: {dst_path}")
+        else:
+            reporter.log(f"Copying file: {dst_path}")
+        install_journal.begin_write(target)
+        write_stream(entry.stream, dst_path)
+        return not os.path.dirname(target) and target.lower().endswith('.exe')
+
+    install_journal = InstallJournal.begin(archive_path, destination_path, [])
+    try:
+        if game_inventory is not None:
+            copy_game_files(game_path, separate_mod_path, processed_size, total_size, workers,
+                            inventory=game_inventory, reporter=reporter, store=store)
+        with open(archive_path, 'rb') as archive_file, tracing.span('stream archive') as span:
+            for entry in archive_sources.iter_entries(archive_path, archive_file):
+                control.checkpoint()
+                parts = entry.path.split('/')
+                if not entry.is_dir:
+                    span.add(1, entry.size)
+                if mod_root is None:
+                    mod_root = entry_mod_root(parts, entry.is_dir)
+                    if mod_root is None:
+                        if not entry.is_dir and classify_member(parts) is not None:
+                            pending_size += entry.size
+                            if pending_size > PENDING_MEMORY_LIMIT:
+                                raise InstallError("Too many mod files come before the game folders in this "
+                                                   "archive; extract it and install the extracted zip instead.")
+                            pending.append((entry._replace(stream=io.BytesIO(entry.stream.read())), parts))
+                        continue
+                    reporter.log(f"Mod root in archive: /{'/'.join(mod_root)}")
+                    for held, held_parts in pending:
+                        if tuple(held_parts[:len(mod_root)]) == mod_root:
+                            open_dir = install_entry(held, held_parts) or open_dir
+                    pending = []
+                if tuple(parts[:len(mod_root)]) == mod_root:
+                    open_dir = install_entry(entry, parts) or open_dir
+                reporter.report_progress(((game_dir_size + archive_file.tell()) / total_size) * 100)
+    except archive_sources.ArchiveError as e:
+        raise InstallError(str(e)) from e
+    finally:
+        install_journal.close()
+    install_journal.commit()
+
+    if mod_root is None:
+        reporter.log("None of the target directories or files found in the archive.")
+    reporter.report_progress(100)
+    return open_dir
+
+def execute_plan(plan, processed_size, workers=None, reporter=NULL_REPORTER, store=None):
+    """Carry out an InstallPlan, streaming each member of the archive straight to its final path.
+
+    Members are inflated in parallel by zip_members.extract_members, which
+    checks each one's CRC-32 as it is written. Progress is written to an
+    InstallJournal in the destination, so an interrupted install of the same
+    archive, or one with files that failed verification, picks up where it
+    stopped.
+    Returns True when the mod put an executable into the destination root.
+    """
+    for line in plan.describe():
+        reporter.log(line)
+    if plan.mod_root is None:
+        return False
+
+    install_journal = InstallJournal.begin(plan.zip_path, plan.destination_path, [
+        (operation.target, operation.action) for operation in plan.operations
+        if operation.action in (WRITE, OVERWRITE)
+        ])
+    if install_journal.resumed:
+        reporter.log(f"Resuming an interrupted install ({len(install_journal.completed)} files already written).")
+
+    total_size = plan.total_bytes or 100
+    if plan.game_inventory is not None:
+        copy_game_files(
+            plan.game_path,
+            plan.destination_path,
+            processed_size,
+            total_size,
+            workers,
+            inventory=plan.game_inventory,
+            reporter=reporter,
+            skip_copied=True,
+            store=store)
+
+    # Last entry wins when an archive lists a path twice, as it would when extracted in order
+    jobs = {}
+    try:
+        for operation in plan.operations:
+            dst_path = os.path.join(plan.destination_path, operation.target)
+            if operation.action == MKDIR:
+                os.makedirs(dst_path, exist_ok=True)
+                continue
+            if operation.action != SKIP and not install_journal.is_complete(operation.target):
+                if operation.action == OVERWRITE:
+                    reporter.log(f"Overwriting file: {dst_path}")
+                else:
+                    reporter.log(f"Copying file: {dst_path}")
+                install_journal.back_up(operation.target)
+                replaced = jobs.pop(os.path.normcase(operation.target), None)
+                if replaced is not None:
+                    processed_size[0] += replaced[1].size
+                jobs[os.path.normcase(operation.target)] = (
+                    ExtractJob(operation.member, dst_path, operation.size), operation)
+                continue
+            processed_size[0] += operation.size
+            reporter.report_progress((processed_size[0] / total_size) * 100)
+
+        operations = dict(jobs.values())
+
+        def on_written(job):
+            operation = operations[job]
+            install_journal.record_done(operation.target)
+            plan.manifest.record(operation.target, operation.member.CRC)
+            processed_size[0] += job.size
+            reporter.report_progress((processed_size[0] / total_size) * 100)
+
+        with tracing.span('write mod files', files=len(operations), size=sum(job.size for job in operations)):
+            report = extract_members(plan.zip_path, list(operations), on_written, workers)
+    finally:
+        install_journal.close()
+        plan.manifest.save()
+    for line in describe_write_report(report):
+        reporter.log(line)
+    if report.failed:
+        # The journal stays, so installing the archive again rewrites only the failed files
+        raise InstallError(f"{len(report.failed)} files failed verification against the archive; "
+                           "install it again to retry them, or roll the install back.")
+    install_journal.commit()
+
+    return plan.opens_directory
+
+def rollback_install(destination_path, reporter=NULL_REPORTER):
+    """Undo an unfinished install in destination_path using its journal and saved originals."""
+    install_journal = InstallJournal.load(destination_path)
+    if install_journal is None:
+        reporter.log(f"No unfinished install found in: {destination_path}")
+        return False
+    changed = install_journal.rollback()
+    reporter.log(f"Rolled back {changed} files in: {destination_path}")
+    return True
+
+def process_extracted_files(
+        extract_path,
+        game_path,
+        processed_size,
+        total_size,
+        destination_path=None,
+        reporter=NULL_REPORTER,
+        mod_root=None,
+        install_journal=None):
+    """Process Game files after zip extraction.
+
+    mod_root is the mod's folder inside the archive as found by
+    planner.detect_mod_root; without it the extracted tree is scanned and
+    ranked the same way. Copies are recorded in install_journal, if given.
+    """
+    open_dir = False
+    target_files = TARGET_FILES
+    target_dirs = TARGET_DIRS
+    executable_extensions = EXECUTABLE_EXTENSIONS
+
+    if destination_path is None:
+        destination_path = game_path  # Use game path if no separate mod path is provided
+
+    if mod_root is None:
+        with tracing.span('locate mod root'):
+            inventory = FileInventory.scan(extract_path)
+            detection = detect_mod_root((entry.path, entry.type == DIR) for entry in inventory.entries)
+        for line in describe_root_detection(detection):
+            reporter.log(line)
+        mod_root = detection.root
+    if mod_root is None:
+        reporter.log("None of the target directories or files found in the extracted path.")
+        return open_dir
+    base_dir = os.path.join(extract_path, *mod_root)
+
+    # Process files and directories from the found base directory
+    copied_before = processed_size[0]
+    with tracing.span('copy mod files') as span:
+        for root, dirs, files in os.walk(base_dir, topdown=True):
+            # Files processing
+            for name in files:
+                src_path = os.path.join(root, name)
+                # Determine if the file is an executable or script and handle accordingly
+                if any(name.lower().endswith(ext) for ext in executable_extensions):
+                    # Executables go directly to destination_path
+                    dst_path = name
+                    reporter.log(f"Moving executable/script: {name}")
+                    overwrite_file(
+                        src_path,
+                        dst_path,
+                        processed_size,
+                        destination_path,
+                        total_size,
+                        reporter,
+                        install_journal)
+                    if name.lower().endswith('.exe'):
+                        open_dir = True
+                elif name in target_files:
+                    # Target files go to 'game' directory inside destination_path
+                    dst_path = os.path.join('game', name)
+                    reporter.log(f"Moving target file: {name} to {dst_path}")
+                    overwrite_file(
+                    src_path,
+                    dst_path,
+                    processed_size,
+                    destination_path,
+                    total_size,
+                    reporter,
+                    install_journal)
+
+            # Directories processing
+            for name in dirs:
+                src_path = os.path.join(root, name)
+                if name in target_dirs or name.endswith('.app'):
+                    # Target directories are copied to the destination_path
+                    reporter.log(f"Copying directory: {name}")
+                    merge_directories(src_path, name, processed_size, destination_path, total_size,
+                                      reporter=reporter, install_journal=install_journal)
+
+            # Modify dirs list to exclude the target directories since they are already processed
+            dirs[:] = [d for d in dirs if d not in target_dirs and not d.endswith('.app')]
+        span.add(size=processed_size[0] - copied_before)
+
+    return open_dir
@@ -0,0 +1,66 @@
+"""DDLC Mod Installer Filesystem Inventory"""
+import os
+from collections import namedtuple
+import tracing
+
+FILE = 'file'
+DIR = 'dir'
+LINK = 'link'  # Symlink to a directory, listed but never descended into (like os.walk)
+# The manifest, journal and backups DDMI keeps in a destination's root all start with this
+BOOKKEEPING_PREFIX = '.ddmi'
+
+InventoryEntry = namedtuple('InventoryEntry', ['path', 'size', 'mtime', 'type'])
+
+
+class FileInventory:
+    """Every entry below a directory, stat-ed exactly once.
+
+    Entry paths are relative to root. Directories are listed before their
+    contents, so reversing the table gives a safe deletion order.
+    """
+
+    def __init__(self, root, entries):
+        self.root = root
+        self.entries = entries
+
+    @classmethod
+    def scan(cls, root):
+        """Walk root with os.scandir and build its inventory."""
+        entries = []
+        pending = ['']
+        with tracing.span('scan', path=root) as span:
+            while pending:
+                rel_dir = pending.pop()
+                with os.scandir(os.path.join(root, rel_dir)) as iterator:
+                    for entry in iterator:
+                        rel_path = os.path.join(rel_dir, entry.name)
+                        if entry.is_dir():
+                            if entry.is_symlink():
+                                entries.append(InventoryEntry(rel_path, 0, 0, LINK))
+                            else:
+                                stat = entry.stat(follow_symlinks=False)
+                                entries.append(InventoryEntry(rel_path, 0, stat.st_mtime_ns, DIR))
+                                pending.append(rel_path)
+                        else:
+                            stat = entry.stat()
+                            entries.append(InventoryEntry(rel_path, stat.st_size, stat.st_mtime_ns, FILE))
+                            span.add(1, stat.st_size)
+        return cls(root, entries)
+
+    def without_bookkeeping(self):
+        """The inventory without DDMI's own files in root, for copying a game tree elsewhere."""
+        return FileInventory(self.root, [
+            entry for entry in self.entries
+            if not entry.path.split(os.sep, 1)[0].startswith(BOOKKEEPING_PREFIX)
+            ])
+
+    @property
+    def files(self):
+        return [entry for entry in self.entries if entry.type == FILE]
+
+    @property
+    def total_size(self):
+        return sum(entry.size for entry in self.entries if entry.type == FILE)
+
+    def abspath(self, entry):
+        return os.path.join(self.root, entry.path)
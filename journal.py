@@ -0,0 +1,207 @@
+"""DDLC Mod Installer Install Journal
+
+A write-ahead journal kept in the destination while a mod is being
+installed. The first line records the archive and every planned file
+operation; completed writes are appended in batches. Installs that only
+find out what they write as they go (a tar archive read front to back, an
+extracted tree) append each operation instead, just before its file is
+written. If the install dies
+halfway, the next install of the same archive skips everything the journal
+shows as done (after a size/mtime check) and carries on from there.
+
+Files an install replaces are first moved into a backup folder, so an
+unfinished install can also be rolled back to the original files.
+"""
+import os
+import json
+import time
+import copy_engine
+
+JOURNAL_NAME = '.ddmi_journal.jsonl'
+BACKUP_DIR_NAME = '.ddmi_backup'
+FLUSH_EVERY = 64
+FLUSH_INTERVAL = 1.0
+
+
+def archive_fingerprint(zip_path):
+    """Identify an archive cheaply by its absolute path, size and mtime."""
+    stat = os.stat(zip_path)
+    return {'zip': os.path.abspath(zip_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+class InstallJournal:
+    """The journal of one install into destination_path."""
+
+    def __init__(self, destination_path, header, completed=None):
+        self.destination_path = destination_path
+        self.header = header
+        # target -> (size, mtime) of files known to be fully written
+        self.completed = completed if completed is not None else {}
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._file = None
+
+    @property
+    def path(self):
+        return os.path.join(self.destination_path, JOURNAL_NAME)
+
+    @property
+    def backup_path(self):
+        return os.path.join(self.destination_path, BACKUP_DIR_NAME)
+
+    @property
+    def planned(self):
+        """target -> action ('write' or 'overwrite') as first planned."""
+        return self.header['operations']
+
+    @classmethod
+    def load(cls, destination_path):
+        """Read an unfinished journal from destination_path, or return None."""
+        try:
+            with open(os.path.join(destination_path, JOURNAL_NAME), 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+            header = json.loads(lines[0])
+        except (OSError, ValueError, IndexError):
+            return None
+        completed = {}
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Torn last write from the crash
+            if 'action' in record:
+                header['operations'].setdefault(record['target'], record['action'])
+            else:
+                completed[record['target']] = (record['size'], record['mtime'])
+        return cls(destination_path, header, completed)
+
+    @classmethod
+    def begin(cls, zip_path, destination_path, operations):
+        """Resume the journal of an unfinished install of zip_path, or start a new one.
+
+        operations are the (target, action) pairs of the planned writes.
+        """
+        fingerprint = archive_fingerprint(zip_path)
+        existing = cls.load(destination_path)
+        if existing is not None and existing.header.get('archive') == fingerprint:
+            existing._open()
+            return existing
+        journal = cls(destination_path, {'archive': fingerprint, 'operations': dict(operations)})
+        journal._start()
+        return journal
+
+    @property
+    def resumed(self):
+        return bool(self.completed)
+
+    def _start(self):
+        os.makedirs(self.destination_path, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(self.header) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def is_complete(self, target):
+        """True if target was written by this install and still looks the way it was left."""
+        record = self.completed.get(target)
+        if record is None:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.destination_path, target))
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == tuple(record)
+
+    def back_up(self, target):
+        """Move the original file at target aside before it is replaced.
+
+        Only the first original is kept, so a resumed install never backs up
+        a file that it wrote itself.
+        """
+        if self.planned.get(target) != 'overwrite':
+            return
+        dst_path = os.path.join(self.destination_path, target)
+        backup = os.path.join(self.backup_path, target)
+        if os.path.lexists(backup) or not os.path.lexists(dst_path):
+            return
+        os.makedirs(os.path.dirname(backup), exist_ok=True)
+        os.replace(dst_path, backup)
+
+    def begin_write(self, target):
+        """Journal a write that was not planned up front and move aside the file it replaces.
+
+        The operation reaches the journal file before the write does. A
+        target planned earlier keeps its first action, so a file this
+        install wrote itself is never taken for an original.
+        """
+        if target not in self.planned:
+            action = 'overwrite' if os.path.lexists(os.path.join(self.destination_path, target)) else 'write'
+            self.planned[target] = action
+            self._file.write(json.dumps({'target': target, 'action': action}) + '\n')
+            self._file.flush()
+        self.back_up(target)
+
+    def record_done(self, target):
+        """Note that target is fully written; flushed to disk in batches."""
+        stat = os.stat(os.path.join(self.destination_path, target))
+        self.completed[target] = (stat.st_size, stat.st_mtime_ns)
+        self._pending.append(json.dumps({'target': target, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}))
+        if len(self._pending) >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self._pending and self._file is not None:
+            self._file.write('\n'.join(self._pending) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def commit(self):
+        """The install finished: drop the journal and the saved originals."""
+        self.close()
+        copy_engine.remove_tree(self.backup_path)
+        os.remove(self.path)
+
+    def rollback(self):
+        """Undo an unfinished install: restore saved originals and remove newly added files.
+
+        Game files copied for a separate-directory install are left in place.
+        Returns the number of files restored or removed.
+        """
+        self.close()
+        changed = 0
+        for target, action in self.planned.items():
+            dst_path = os.path.join(self.destination_path, target)
+            backup = os.path.join(self.backup_path, target)
+            if os.path.lexists(backup):
+                os.replace(backup, dst_path)
+                changed += 1
+            elif action == 'write' and os.path.lexists(dst_path):
+                os.remove(dst_path)
+                changed += 1
+        copy_engine.remove_tree(self.backup_path)
+        os.remove(self.path)
+        return changed
+
+
+def rollback_stale(zip_path, destination_path):
+    """Roll back an unfinished install of a different archive into destination_path.
+
+    Returns the archive that was rolled back and how many files changed, or
+    None if there was nothing to roll back.
+    """
+    existing = InstallJournal.load(destination_path)
+    if existing is None or existing.header.get('archive') == archive_fingerprint(zip_path):
+        return None
+    return existing.header.get('archive', {}).get('zip'), existing.rollback()
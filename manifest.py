@@ -0,0 +1,92 @@
+"""DDLC Mod Installer Install Manifest"""
+import os
+import json
+import zlib
+
+MANIFEST_NAME = '.ddmi_manifest.json'
+MANIFEST_VERSION = 1
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def file_crc32(path):
+    """CRC32 of a file on disk, the same checksum zip archives store for their members."""
+    crc = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_BUFFER_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def manifest_key(rel_path):
+    """Normalise a destination-relative path so the manifest is portable between platforms."""
+    return rel_path.replace(os.sep, '/')
+
+
+class InstallManifest:
+    """Record of what an install wrote to a destination directory.
+
+    Every entry stores the size, mtime and CRC32 of a written file, keyed by
+    its path relative to the destination, so a later install can skip files
+    whose content already matches the incoming zip member.
+    """
+
+    def __init__(self, destination_path, entries=None):
+        self.destination_path = destination_path
+        self.entries = entries if entries is not None else {}
+
+    @property
+    def path(self):
+        return os.path.join(self.destination_path, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, destination_path):
+        """Load the manifest of destination_path, or start an empty one."""
+        try:
+            with open(os.path.join(destination_path, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == MANIFEST_VERSION:
+                return cls(destination_path, data['files'])
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls(destination_path)
+
+    def save(self):
+        """Write the manifest atomically so an interrupted install never leaves it half written."""
+        os.makedirs(self.destination_path, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.entries}, file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def current_crc(self, rel_path):
+        """CRC32 of the file now at rel_path, or None if it is missing.
+
+        Uses the recorded checksum while the file's size and mtime still match
+        the manifest and only hashes the file when they do not.
+        """
+        key = manifest_key(rel_path)
+        try:
+            stat = os.stat(os.path.join(self.destination_path, rel_path))
+        except OSError:
+            self.entries.pop(key, None)
+            return None
+        entry = self.entries.get(key)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['crc']
+        crc = file_crc32(os.path.join(self.destination_path, rel_path))
+        self.entries[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'crc': crc}
+        return crc
+
+    def is_unchanged(self, rel_path, size, crc):
+        """True if the file at rel_path already has the given size and CRC32."""
+        entry_path = os.path.join(self.destination_path, rel_path)
+        try:
+            if os.path.getsize(entry_path) != size:
+                return False
+        except OSError:
+            return False
+        return self.current_crc(rel_path) == crc
+
+    def record(self, rel_path, crc):
+        """Remember a file that was just written with the given CRC32."""
+        stat = os.stat(os.path.join(self.destination_path, rel_path))
+        self.entries[manifest_key(rel_path)] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'crc': crc}
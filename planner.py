@@ -0,0 +1,317 @@
+"""DDLC Mod Installer Install Planner"""
+import os
+import zipfile
+from collections import namedtuple, Counter
+from manifest import InstallManifest
+from inventory import FileInventory
+
+TARGET_FILES = ['audio.rpa', 'fonts.rpa', 'images.rpa', 'scripts.rpa']
+TARGET_DIRS = ['game', 'characters', 'lib', 'renpy']
+EXECUTABLE_EXTENSIONS = ['.exe', '.bat', '.sh', '.py']
+
+MKDIR = 'mkdir'
+WRITE = 'write'
+OVERWRITE = 'overwrite'
+SKIP = 'skip'
+
+# Weights of the target folders when ranking candidate mod roots
+ROOT_DIR_WEIGHTS = {'game': 4, 'renpy': 3, 'lib': 2, 'characters': 2}
+GAME_FILE_EXTENSIONS = ('.rpa', '.rpyc', '.rpy')
+
+# member is the ZipInfo to install, target is relative to the destination. replaces_game_file marks a
+# file a separate-directory install writes in place of a game file it leaves uncopied
+InstallOperation = namedtuple(
+    'InstallOperation', ['action', 'member', 'target', 'size', 'replaces_game_file'], defaults=(False,))
+# path is a tuple of folder names inside the archive, markers the targets found in it
+RootCandidate = namedtuple('RootCandidate', ['path', 'score', 'markers', 'file_count'])
+ModRootDetection = namedtuple('ModRootDetection', ['root', 'candidates', 'ambiguous'])
+
+
+def zip_member_parts(name):
+    """Split a zip member name into path components, or None if it would escape the destination."""
+    name = os.path.splitdrive(name.replace('\\', '/'))[1]
+    parts = [part for part in name.split('/') if part not in ('', '.')]
+    if not parts or '..' in parts:
+        return None
+    return parts
+
+class PathTrie:
+    """The folders of an archive listing, with the file names directly in each."""
+
+    __slots__ = ('children', 'files', 'file_count')
+
+    def __init__(self):
+        self.children = {}
+        self.files = set()
+        self.file_count = 0  # Files anywhere below this folder
+
+    @classmethod
+    def build(cls, names):
+        """Build a trie from (name, is_dir) pairs; unsafe names are left out."""
+        root = cls()
+        for name, is_dir in names:
+            parts = zip_member_parts(name)
+            if parts is None:
+                continue
+            node = root
+            for part in parts if is_dir else parts[:-1]:
+                if not is_dir:
+                    node.file_count += 1
+                node = node.children.get(part) or node.children.setdefault(part, cls())
+            if not is_dir:
+                node.file_count += 1
+                node.files.add(parts[-1])
+        return root
+
+    def walk(self):
+        """Yield (path parts, node) for every folder, without descending into the game folders."""
+        pending = [((), self)]
+        while pending:
+            path, node = pending.pop()
+            yield path, node
+            for name, child in node.children.items():
+                if name not in TARGET_DIRS:
+                    pending.append((path + (name,), child))
+
+
+def score_root(node):
+    """Score a folder by the DDLC markers directly inside it; returns (score, markers)."""
+    markers = []
+    score = 0
+    for name in TARGET_DIRS:
+        child = node.children.get(name)
+        if child is not None:
+            markers.append(name + '/')
+            score += ROOT_DIR_WEIGHTS[name]
+            if name == 'game' and any(file.endswith(GAME_FILE_EXTENSIONS) for file in child.files):
+                score += 2  # A game folder with scripts or archives in it is the real thing
+    for name in TARGET_FILES:
+        if name in node.files:
+            markers.append(name)
+            score += 2
+    if markers:
+        score += sum(1 for name in node.files if name.lower().endswith(tuple(EXECUTABLE_EXTENSIONS)))
+    return score, markers
+
+def detect_mod_root(names):
+    """Rank every folder of an archive listing that could be the mod root.
+
+    names are (name, is_dir) pairs. A folder is a candidate when it holds
+    one of the target folders or .rpa files, the same test
+    process_extracted_files used to make while walking the extracted tree.
+    Candidates are ranked by score_root, then by how many files they hold,
+    then by depth. This runs in one pass over the listing, before anything
+    is written.
+    """
+    candidates = []
+    for path, node in PathTrie.build(names).walk():
+        score, markers = score_root(node)
+        if markers:
+            candidates.append(RootCandidate(path, score, markers, node.file_count))
+    candidates.sort(key=lambda candidate: (
+        -candidate.score, -candidate.file_count, len(candidate.path), candidate.path))
+    if not candidates:
+        return ModRootDetection(None, [], False)
+    ambiguous = len(candidates) > 1 and candidates[1].score == candidates[0].score
+    return ModRootDetection(candidates[0].path, candidates, ambiguous)
+
+def describe_root_detection(detection):
+    """Console lines about rival mod roots, if there were any."""
+    if len(detection.candidates) < 2:
+        return []
+    best = detection.candidates[0]
+    lines = []
+    if detection.ambiguous:
+        tied = [candidate for candidate in detection.candidates if candidate.score == best.score]
+        lines.append(
+            f"Ambiguous mod root: {len(tied)} folders score {best.score}; "
+            f"using /{'/'.join(best.path)} ({best.file_count} files)")
+    for candidate in detection.candidates[1:]:
+        lines.append(
+            f"Other mod root candidate: /{'/'.join(candidate.path)} "
+            f"(score {candidate.score}: {', '.join(candidate.markers)})")
+    return lines
+
+def find_zip_mod_root(infos):
+    """Find the archive folder that holds the mod from the zip's central directory."""
+    return detect_mod_root((info.filename, info.is_dir()) for info in infos).root
+
+def entry_mod_root(parts, is_dir=False):
+    """The shallowest folder that a single entry shows to be a mod root, or None.
+
+    Used when an archive is read as a stream and the whole listing is not
+    known up front.
+    """
+    dir_parts = parts if is_dir else parts[:-1]
+    for index, name in enumerate(dir_parts):
+        if name in TARGET_DIRS:
+            return tuple(parts[:index])
+    if not is_dir and parts[-1] in TARGET_FILES:
+        return tuple(parts[:-1])
+    return None
+
+def classify_member(parts, is_dir=False):
+    """Return where an entry below the mod root goes, relative to the destination, or None to skip it."""
+    dir_parts = parts if is_dir else parts[:-1]
+    for index, name in enumerate(dir_parts):
+        if name in TARGET_DIRS or name.endswith('.app'):
+            # Target directories are merged into the destination as a whole
+            return os.path.join(*parts[index:])
+    if is_dir:
+        return None
+    name = parts[-1]
+    if any(name.lower().endswith(ext) for ext in EXECUTABLE_EXTENSIONS):
+        # Executables go directly to destination_path
+        return name
+    if name in TARGET_FILES:
+        # Target files go to 'game' directory inside destination_path
+        return os.path.join('game', name)
+    return None
+
+
+class InstallPlan:
+    """Ordered operations that install a mod archive, worked out without writing anything."""
+
+    def __init__(self, zip_path, game_path, destination_path, mod_root, operations,
+                 game_inventory=None, manifest=None, root_detection=None):
+        self.zip_path = zip_path
+        self.game_path = game_path
+        self.destination_path = destination_path
+        self.mod_root = mod_root
+        self.operations = operations
+        # Game files still to copy for a separate-directory install, minus the ones the mod replaces
+        self.game_inventory = game_inventory
+        self.manifest = manifest
+        self.root_detection = root_detection
+
+    @property
+    def file_operations(self):
+        return [operation for operation in self.operations if operation.action != MKDIR]
+
+    @property
+    def conflicts(self):
+        """Operations that replace a file already in the game tree."""
+        return [
+            operation for operation in self.operations
+            if operation.action == OVERWRITE or operation.replaces_game_file
+            ]
+
+    @property
+    def mod_bytes(self):
+        return sum(operation.size for operation in self.file_operations)
+
+    @property
+    def write_bytes(self):
+        """Bytes the mod will actually write, leaving out skipped files."""
+        return sum(operation.size for operation in self.operations if operation.action in (WRITE, OVERWRITE))
+
+    @property
+    def game_bytes(self):
+        return self.game_inventory.total_size if self.game_inventory is not None else 0
+
+    @property
+    def total_bytes(self):
+        """Progress denominator: copied game files plus every mod file, skipped or not."""
+        return self.game_bytes + self.mod_bytes
+
+    @property
+    def opens_directory(self):
+        """True when the mod puts an .exe into the destination root."""
+        return any(
+            not os.path.dirname(operation.target) and operation.target.lower().endswith('.exe')
+            for operation in self.file_operations
+            )
+
+    def describe(self, max_conflicts=50):
+        """Human readable summary lines for the console."""
+        if self.mod_root is None:
+            return ["None of the target directories or files found in the zip file."]
+        counts = Counter(operation.action for operation in self.operations)
+        lines = [
+            f"Install plan for {self.zip_path} -> {self.destination_path}",
+            f"Mod root in archive: /{'/'.join(self.mod_root)}",
+            ]
+        if self.root_detection is not None:
+            lines += describe_root_detection(self.root_detection)
+        if self.game_inventory is not None:
+            lines.append(f"Copy game files: {len(self.game_inventory.files)} files, {format_size(self.game_bytes)}")
+        lines.append(
+            f"Mod files: {counts[WRITE]} new, {counts[OVERWRITE]} overwritten, "
+            f"{counts[SKIP]} unchanged, {counts[MKDIR]} directories"
+            )
+        lines.append(f"Bytes to write: {format_size(self.game_bytes + self.write_bytes)}")
+        conflicts = self.conflicts
+        for operation in conflicts[:max_conflicts]:
+            lines.append(f"Conflict: {operation.target}")
+        if len(conflicts) > max_conflicts:
+            lines.append(f"... and {len(conflicts) - max_conflicts} more conflicts")
+        return lines
+
+
+def format_size(size):
+    """Format a byte count for the console."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def member_targets(infos, mod_root):
+    """Yield (info, target) for every member under mod_root that the installer places."""
+    for info in infos:
+        parts = zip_member_parts(info.filename)
+        if parts is None or len(parts) <= len(mod_root) or tuple(parts[:len(mod_root)]) != mod_root:
+            continue
+        target = classify_member(parts[len(mod_root):], info.is_dir())
+        if target is not None:
+            yield info, target
+
+def plan_install(zip_path, game_path, separate_mod_path=None, zip_ref=None):
+    """Work out how a mod archive would be installed by reading only its central directory.
+
+    Pass an open zip_ref to reuse it; the archive is otherwise opened and
+    closed here. The returned plan can be executed with installer.execute_plan.
+    """
+    if zip_ref is None:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            return plan_install(zip_path, game_path, separate_mod_path, zip_ref)
+
+    destination_path = separate_mod_path if separate_mod_path else game_path
+    infos = zip_ref.infolist()
+    detection = detect_mod_root((info.filename, info.is_dir()) for info in infos)
+    mod_root = detection.root
+    game_inventory = None
+    game_files = set()
+    if separate_mod_path is not None:
+        game_inventory = FileInventory.scan(game_path).without_bookkeeping()
+        game_files = {os.path.normcase(entry.path) for entry in game_inventory.files}
+    if mod_root is None:
+        return InstallPlan(zip_path, game_path, destination_path, None, [], game_inventory,
+                           root_detection=detection)
+
+    install_manifest = InstallManifest.load(destination_path)
+    operations = []
+    planned = set()
+    for info, target in member_targets(infos, mod_root):
+        if info.is_dir():
+            operations.append(InstallOperation(MKDIR, info, target, 0))
+            continue
+
+        key = os.path.normcase(target)
+        if key not in planned and install_manifest.is_unchanged(target, info.file_size, info.CRC):
+            action = SKIP
+        else:
+            # Only a file on disk is backed up and restored, so a game file that is never
+            # copied into a separate directory is a write there, not an overwrite
+            action = OVERWRITE if os.path.lexists(os.path.join(destination_path, target)) else WRITE
+        planned.add(key)
+        operations.append(InstallOperation(action, info, target, info.file_size, key in game_files))
+
+    if game_inventory is not None:
+        # Game files the mod replaces are never copied only to be overwritten
+        game_inventory = FileInventory(game_path, [
+            entry for entry in game_inventory.entries if os.path.normcase(entry.path) not in planned
+            ])
+    # Directories first, then files in central directory order
+    operations.sort(key=lambda operation: operation.action != MKDIR)
+    return InstallPlan(
+        zip_path, game_path, destination_path, mod_root, operations, game_inventory, install_manifest, detection)
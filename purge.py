@@ -0,0 +1,113 @@
+"""DDLC Mod Installer Background Purge
+
+Deleting a game directory is split in two: the directory is first renamed to
+a hidden sibling "tombstone", which frees its path at once, and the tombstone
+is then purged in the background. Tombstones are recorded in the DDMI data
+directory so a purge cut short by closing the app is resumed on next launch.
+"""
+import os
+import json
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from settings import data_dir
+from copy_engine import DEFAULT_WORKERS, remove_file
+
+TOMBSTONE_MARKER = '.ddmi-tombstone-'
+REGISTRY_NAME = 'tombstones.json'
+
+_registry_lock = threading.Lock()
+
+
+def _registry_path():
+    return os.path.join(data_dir(), REGISTRY_NAME)
+
+def pending_tombstones():
+    """Tombstones recorded by earlier deletes that may still need purging."""
+    try:
+        with open(_registry_path(), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+def _update_registry(add=None, remove=None):
+    with _registry_lock:
+        tombstones = [path for path in pending_tombstones() if path != remove]
+        if add is not None and add not in tombstones:
+            tombstones.append(add)
+        temp_path = _registry_path() + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(tombstones, file)
+        os.replace(temp_path, _registry_path())
+
+def move_to_tombstone(path):
+    """Atomically rename path to a hidden sibling and return the tombstone's path.
+
+    Raises OSError if the rename is not possible, e.g. because a file inside
+    is still open on Windows; callers should then delete in place instead.
+    """
+    path = os.path.abspath(path)
+    parent, name = os.path.split(path.rstrip(os.sep))
+    tombstone = os.path.join(parent, f".{name}{TOMBSTONE_MARKER}{uuid.uuid4().hex[:8]}")
+    # Record first so a crash right after the rename still leaves a trace to resume from
+    _update_registry(add=tombstone)
+    try:
+        os.rename(path, tombstone)
+    except OSError:
+        _update_registry(remove=tombstone)
+        raise
+    return tombstone
+
+def purge_tree(path, workers=None, on_progress=None):
+    """Delete path and everything in it with parallel scandir/unlink workers.
+
+    on_progress(files, bytes) is called from the workers after each directory
+    is emptied. Returns the total (files, bytes) removed.
+    """
+    lock = threading.Lock()
+    directories = []
+    totals = [0, 0]
+
+    def purge_directory(directory):
+        subdirectories = []
+        files = size = 0
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                    continue
+                try:
+                    size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+                remove_file(entry.path)  # Read-only on Windows when linked from the content store
+                files += 1
+        with lock:
+            directories.append(directory)
+            totals[0] += files
+            totals[1] += size
+        if on_progress is not None:
+            on_progress(files, size)
+        return subdirectories
+
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as pool:
+        pending = {pool.submit(purge_directory, path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for subdirectory in future.result():
+                    pending.add(pool.submit(purge_directory, subdirectory))
+
+    # Children have longer paths than their parents, so this removes bottom-up
+    for directory in sorted(directories, key=len, reverse=True):
+        os.rmdir(directory)
+    return totals[0], totals[1]
+
+def purge_tombstone(tombstone, workers=None, on_progress=None):
+    """Purge a tombstone and forget it once it is gone."""
+    result = (0, 0)
+    # Never purge anything that this module did not rename, whatever the registry says
+    if TOMBSTONE_MARKER in os.path.basename(tombstone) and os.path.lexists(tombstone):
+        result = purge_tree(tombstone, workers, on_progress)
+    _update_registry(remove=tombstone)
+    return result
@@ -0,0 +1,145 @@
+"""DDMI Install Queue Widget
+
+A table of queued installs with a progress bar per job, the log of the
+selected job, and controls for the number of jobs that run at once. The
+InstallQueue runs the jobs on its own threads; the widget only reads their
+state, on a timer on the GUI thread.
+"""
+import os
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QProgressBar,
+    QPlainTextEdit,
+    QAbstractItemView,
+    QHeaderView
+    )
+from PySide6.QtCore import QTimer
+from install_queue import InstallQueue, DEFAULT_MAX_JOBS, JOB_LOG_LINES, QUEUED, FINISHED
+from signal_manager import signal_manager
+
+REFRESH_INTERVAL_MS = 200
+COLUMNS = ["#", "Mod", "Destination", "Status", "Progress", "Time"]
+PROGRESS_COLUMN = COLUMNS.index("Progress")
+
+
+class InstallQueueWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = InstallQueue(on_finished=self.on_job_finished)
+        self.rows = []  # QueueJobs in table order
+        self.shown_log = (None, 0)  # (job, lines shown) in the log view
+
+        layout = QVBoxLayout()
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(QLabel("Install Queue"))
+        controls_layout.addStretch()
+        controls_layout.addWidget(QLabel("Run at Once:"))
+        self.max_jobs_spinbox = QSpinBox()
+        self.max_jobs_spinbox.setRange(1, 8)
+        self.max_jobs_spinbox.setValue(DEFAULT_MAX_JOBS)
+        controls_layout.addWidget(self.max_jobs_spinbox)
+        self.cancel_job_button = QPushButton("Cancel Job")
+        self.clear_button = QPushButton("Clear Finished")
+        controls_layout.addWidget(self.cancel_job_button)
+        controls_layout.addWidget(self.clear_button)
+        layout.addLayout(controls_layout)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.job_log = QPlainTextEdit()
+        self.job_log.setReadOnly(True)
+        self.job_log.setMaximumBlockCount(JOB_LOG_LINES)
+        self.job_log.setPlaceholderText("Select a job to see its log.")
+        layout.addWidget(self.job_log)
+        self.setLayout(layout)
+
+        self.max_jobs_spinbox.valueChanged.connect(lambda value: self.queue.set_max_jobs(value))
+        self.cancel_job_button.clicked.connect(lambda: self.cancel_selected())
+        self.clear_button.clicked.connect(lambda: self.clear_finished())
+        self.table.itemSelectionChanged.connect(lambda: self.refresh_log(reset=True))
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_INTERVAL_MS)
+
+    def add_job(self, zip_path, game_path, target_dir=None, use_store=None, low_priority=False):
+        """Queue an install and give it a row."""
+        job = self.queue.add(zip_path, game_path, target_dir, use_store, low_priority)
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.rows.append(job)
+        for column, text in enumerate([
+                str(job.number), os.path.basename(zip_path), job.destination, job.status, None, ""]):
+            if text is not None:
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 100)
+        self.table.setCellWidget(row, PROGRESS_COLUMN, progress_bar)
+        signal_manager.log(f"Queued install #{job.number}: {zip_path} -> {job.destination}")
+        return job
+
+    def selected_job(self):
+        rows = self.table.selectionModel().selectedRows()
+        return self.rows[rows[0].row()] if rows else None
+
+    def cancel_selected(self):
+        job = self.selected_job()
+        if job is not None and job.status not in FINISHED:
+            self.queue.cancel(job)
+
+    def clear_finished(self):
+        self.queue.clear_finished()
+        for row in reversed(range(len(self.rows))):
+            if self.rows[row].status in FINISHED:
+                self.table.removeRow(row)
+                del self.rows[row]
+        self.refresh_log(reset=True)
+
+    def set_rate(self, rate):
+        self.queue.set_rate(rate)
+
+    def refresh(self):
+        """Copy every job's status and progress into its row."""
+        for row, job in enumerate(self.rows):
+            status = job.status
+            self.table.item(row, COLUMNS.index("Status")).setText(status)
+            if status != QUEUED:
+                self.table.item(row, COLUMNS.index("Time")).setText(f"{job.elapsed():.1f}s")
+            self.table.cellWidget(row, PROGRESS_COLUMN).setValue(int(job.progress if status != QUEUED else 0))
+        self.refresh_log()
+
+    def refresh_log(self, reset=False):
+        """Append the selected job's new log lines to the log view."""
+        job = self.selected_job()
+        shown_job, shown = self.shown_log
+        if reset or job is not shown_job:
+            self.job_log.clear()
+            shown = 0
+        if job is None:
+            self.shown_log = (None, 0)
+            return
+        logged, lines = job.log_since(shown)
+        if lines:
+            self.job_log.appendPlainText("\n".join(lines))
+        self.shown_log = (job, logged)
+
+    def on_job_finished(self, job):
+        # Called on the job's thread; signal_manager hands the line to the GUI thread
+        message = f"Queued install #{job.number} {job.status} after {job.elapsed():.1f}s: {job.zip_path}"
+        if job.error:
+            message += f" ({job.error})"
+        signal_manager.log(message)
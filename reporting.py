@@ -0,0 +1,35 @@
+"""DDLC Mod Installer Reporting"""
+import sys
+import threading
+
+
+class Reporter:
+    """Receives console lines and progress from the install engine.
+
+    The engine calls these from worker threads, so implementations must be
+    thread-safe. The GUI's signal_manager implements the same two methods.
+    """
+
+    def log(self, message):
+        pass
+
+    def report_progress(self, value):
+        pass
+
+
+class StreamReporter(Reporter):
+    """Write console lines to a text stream, such as stdout or a per-job log file."""
+
+    def __init__(self, stream=None, prefix=''):
+        self.stream = stream if stream is not None else sys.stdout
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def log(self, message):
+        with self._lock:
+            for line in str(message).splitlines() or ['']:
+                self.stream.write(f"{self.prefix}{line}\n")
+            self.stream.flush()
+
+
+NULL_REPORTER = Reporter()
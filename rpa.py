@@ -0,0 +1,246 @@
+"""Ren'Py Archive Index Reader
+
+Reads the member table of RPA-2.0 and RPA-3.0 archives (the .rpa files in
+DDLC's game folder) without touching their payload: the archive is memory
+mapped, the header line gives the index offset and key, and only the
+zlib-compressed index at that offset is inflated. Tables are cached by the
+archive's path, size and mtime, in memory and in the DDMI data directory.
+
+On top of that, diff_indexes tells which members a mod's archive adds,
+replaces or drops compared to the game's, and find_collisions which
+members several mods ship.
+"""
+import io
+import os
+import json
+import mmap
+import zlib
+import pickle
+import hashlib
+import zipfile
+import threading
+from collections import namedtuple
+from settings import data_dir
+
+HEADER_SIZE = 64
+CACHE_DIR_NAME = 'rpa-index'
+
+# size includes the prefix some RPA-3.0 entries keep in the index itself
+RPAMember = namedtuple('RPAMember', ['offset', 'size'])
+RPADiff = namedtuple('RPADiff', ['added', 'replaced', 'removed', 'same_size'])
+
+SAFE_GLOBALS = {('builtins', 'bytes'), ('__builtin__', 'bytes'), ('_codecs', 'encode')}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class RPAError(ValueError):
+    """A file that is not a readable RPA-2.0/3.0 archive."""
+
+
+class NotInspectable(RPAError):
+    """An archive inside a mod zip whose index could only be read by inflating it."""
+
+
+class _IndexUnpickler(pickle.Unpickler):
+    """Unpickles plain containers only, so a crafted index cannot run code."""
+
+    def find_class(self, module, name):
+        # Protocol 2 pickles build bytes through these
+        if (module, name) in SAFE_GLOBALS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"RPA index refers to {module}.{name}")
+
+
+def parse_header(header):
+    """Return (index offset, key) from the first line of an archive."""
+    fields = header.split(b'\n', 1)[0].split()
+    try:
+        if fields[0] == b'RPA-3.0':
+            return int(fields[1], 16), int(fields[2], 16)
+        if fields[0] == b'RPA-2.0':
+            return int(fields[1], 16), 0
+    except (IndexError, ValueError):
+        pass
+    raise RPAError(f"Not an RPA-2.0/3.0 archive: {header[:16]!r}")
+
+def decode_index(compressed, key):
+    """Inflate and unpickle an index into {name: RPAMember}."""
+    try:
+        index = _IndexUnpickler(io.BytesIO(zlib.decompress(compressed)), encoding='bytes').load()
+    except (zlib.error, pickle.UnpicklingError, EOFError, ValueError) as e:
+        raise RPAError(f"Unreadable RPA index: {e}") from e
+    members = {}
+    try:
+        for name, entries in index.items():
+            if isinstance(name, bytes):
+                name = name.decode('utf-8', 'replace')  # Indexes pickled by Python 2
+            # Ren'Py reads the first entry when a name is listed more than once
+            entry = entries[0]
+            prefix = entry[2] if len(entry) > 2 else b''
+            members[name] = RPAMember(entry[0] ^ key, (entry[1] ^ key) + len(prefix))
+    except (AttributeError, TypeError, IndexError) as e:
+        raise RPAError(f"Unexpected RPA index layout: {e}") from e
+    return members
+
+def index_from_buffer(view):
+    """Read the index of an archive held in a buffer, such as a memory map."""
+    offset, key = parse_header(bytes(view[:HEADER_SIZE]))
+    if offset >= len(view):
+        raise RPAError("RPA index offset is past the end of the archive")
+    # The index is small; copying it out means no slice of the map outlives this call
+    return decode_index(bytes(view[offset:]), key)
+
+def _cache_path(key):
+    digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+    return os.path.join(data_dir(), CACHE_DIR_NAME, f"{digest}.json")
+
+def _cached(key, read):
+    """Return the member table for key from memory, disk, or read() in that order."""
+    with _cache_lock:
+        members = _cache.get(key)
+    if members is not None:
+        return members
+    path = _cache_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data['key'] == list(key):
+            members = {name: RPAMember(*value) for name, value in data['members'].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if members is None:
+        members = read()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'key': list(key), 'members': members}, file, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # The cache is only an optimisation
+    with _cache_lock:
+        _cache[key] = members
+    return members
+
+def read_index(path):
+    """{name: RPAMember} of the archive at path, read from a memory map of it."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    def read():
+        if not stat.st_size:
+            raise RPAError(f"Empty archive: {path}")
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as archive_map:
+            with memoryview(archive_map) as view:
+                return index_from_buffer(view)
+    return _cached(key, read)
+
+def read_zip_member_index(zip_ref, info, inflate=False):
+    """{name: RPAMember} of an archive stored inside a mod zip.
+
+    Stored members are read from a memory map of the zip. Deflated ones
+    would have to be inflated up to the index, since deflate streams cannot
+    be entered midway, which for a game-sized archive is most of the
+    install's work; they raise NotInspectable unless inflate is set.
+    """
+    from zip_members import MappedZip
+    stat = os.stat(zip_ref.filename)
+    key = (os.path.abspath(zip_ref.filename), stat.st_size, stat.st_mtime_ns, info.filename)
+
+    def read():
+        mapped = None
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            mapped = MappedZip.open(zip_ref)
+        if mapped is not None:
+            try:
+                start = mapped.data_offset(info)
+                with mapped.view[start:start + info.file_size] as view:
+                    return index_from_buffer(view)
+            finally:
+                mapped.close()
+        if not inflate:
+            raise NotInspectable("index not inspectable without inflating")
+        with zip_ref.open(info) as member:
+            offset, index_key = parse_header(member.read(HEADER_SIZE))
+            member.seek(offset)
+            return decode_index(member.read(), index_key)
+    return _cached(key, read)
+
+def diff_indexes(old, new):
+    """Compare the member tables of the archive being replaced and the one replacing it.
+
+    Members in both are all counted as replaced, since comparing contents
+    would mean reading the payload; same_size lists those whose size did
+    not change.
+    """
+    replaced = sorted(set(old) & set(new))
+    return RPADiff(
+        added=sorted(set(new) - set(old)),
+        replaced=replaced,
+        removed=sorted(set(old) - set(new)),
+        same_size=[name for name in replaced if old[name].size == new[name].size],
+        )
+
+def find_collisions(mod_indexes):
+    """Members shipped by more than one mod.
+
+    mod_indexes maps a mod's name to {archive target: member table}; Ren'Py
+    merges every archive into one namespace, so a member name counts as a
+    collision whichever .rpa it is in. Returns {member: [mod names]}.
+    """
+    owners = {}
+    for mod_name, archives in mod_indexes.items():
+        for members in archives.values():
+            for name in members:
+                mods = owners.setdefault(name, [])
+                if mod_name not in mods:
+                    mods.append(mod_name)
+    return {name: mods for name, mods in sorted(owners.items()) if len(mods) > 1}
+
+def plan_indexes(plan, zip_ref, inflate=False):
+    """{target: member table} for every readable .rpa an InstallPlan writes."""
+    indexes = {}
+    for operation in plan.file_operations:
+        if operation.target.lower().endswith('.rpa'):
+            try:
+                indexes[operation.target] = read_zip_member_index(zip_ref, operation.member, inflate)
+            except (OSError, RPAError):
+                continue  # describe_changes reports these
+    return indexes
+
+def describe_changes(plan, zip_ref=None, max_names=20, inflate=False):
+    """Console lines on how each .rpa in an InstallPlan differs from the game's copy.
+
+    Without inflate, deflated archives are only listed, which keeps this
+    cheap enough for the Preview.
+    """
+    if zip_ref is None:
+        with zipfile.ZipFile(plan.zip_path, 'r') as zip_ref:
+            return describe_changes(plan, zip_ref, max_names, inflate)
+    lines = []
+    for operation in plan.file_operations:
+        target = operation.target
+        if not target.lower().endswith('.rpa'):
+            continue
+        try:
+            new = read_zip_member_index(zip_ref, operation.member, inflate)
+            game_file = os.path.join(plan.game_path, target)
+            old = read_index(game_file) if os.path.exists(game_file) else {}
+        except NotInspectable as e:
+            lines.append(f"{target}: {e}")
+            continue
+        except (OSError, RPAError) as e:
+            lines.append(f"{target}: cannot read the archive index ({e})")
+            continue
+        diff = diff_indexes(old, new)
+        lines.append(
+            f"{target}: {len(diff.added)} added, {len(diff.replaced)} replaced "
+            f"({len(diff.same_size)} same size), {len(diff.removed)} removed")
+        for label, names in (('added', diff.added), ('replaced', diff.replaced), ('removed', diff.removed)):
+            for name in names[:max_names]:
+                lines.append(f"  {label}: {name}")
+            if len(names) > max_names:
+                lines.append(f"  ... and {len(names) - max_names} more {label}")
+    return lines
@@ -0,0 +1,51 @@
+"""DDMI Settings"""
+import os
+import sys
+
+
+def data_dir():
+    """Directory for DDMI's own state, created on first use.
+
+    DDMI_HOME overrides the platform default (%LOCALAPPDATA%\\DDMI on Windows,
+    $XDG_DATA_HOME/ddmi or ~/.local/share/ddmi elsewhere).
+    """
+    path = os.environ.get('DDMI_HOME')
+    if not path:
+        if sys.platform == 'win32':
+            base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+            path = os.path.join(base, 'DDMI')
+        else:
+            base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+            path = os.path.join(base, 'ddmi')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+DEFAULT_CACHE_LIMIT = 10 * 1024 ** 3
+
+
+def cache_dir():
+    """Where extracted mod archives are cached; DDMI_CACHE_DIR overrides it."""
+    path = os.environ.get('DDMI_CACHE_DIR') or os.path.join(data_dir(), 'cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def store_dir():
+    """Where the shared store of game files lives; DDMI_STORE_DIR overrides it.
+
+    Hard links only work within one drive, so it belongs on the drive the
+    separate mod directories are created on.
+    """
+    path = os.environ.get('DDMI_STORE_DIR') or os.path.join(data_dir(), 'store')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def use_store():
+    """True when separate mod directories link game files from the shared store (DDMI_USE_STORE=1)."""
+    return os.environ.get('DDMI_USE_STORE', '').lower() in ('1', 'true', 'yes', 'on')
+
+def cache_limit():
+    """Total size in bytes the extraction cache may grow to; DDMI_CACHE_LIMIT overrides it."""
+    try:
+        return int(os.environ['DDMI_CACHE_LIMIT'])
+    except (KeyError, ValueError):
+        return DEFAULT_CACHE_LIMIT
@@ -1,8 +1,65 @@
-from PySide6.QtCore import QObject, Signal
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, Signal, QTimer
+
+FLUSH_INTERVAL_MS = 50
+CONSOLE_MAX_LINES = 5000
+
 class SignalManager(QObject):
     console_update = Signal(str)
     progress_update = Signal(float)
     critical_messagebox = Signal(str, str)
     info_messagebox = Signal(str, str)
 
-signal_manager = SignalManager()
\ No newline at end of file
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=CONSOLE_MAX_LINES)
+        self._dropped_lines = 0
+        self._progress = None
+        self._timer = None
+
+    def log(self, message):
+        """Queue a console line from any thread; it is shown on the next flush."""
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped_lines += 1
+            self._lines.append(message)
+
+    def report_progress(self, value):
+        """Record the latest progress from any thread; only the newest value is shown."""
+        with self._lock:
+            self._progress = value
+
+    def start_flushing(self, interval=FLUSH_INTERVAL_MS):
+        """Flush queued events on a fixed-rate timer. Call from the GUI thread."""
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self.flush)
+        self._timer.start(interval)
+
+    def flush(self):
+        """Emit all queued console lines as one update and the latest progress value."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped_lines = self._dropped_lines, 0
+            progress, self._progress = self._progress, None
+        if dropped:
+            lines.insert(0, f"... {dropped} lines omitted ...")
+        if lines:
+            self.console_update.emit("\n".join(lines))
+        if progress is not None:
+            self.progress_update.emit(progress)
+
+    def show_info(self, title, message):
+        """Open an information box from any thread, after the console lines that lead up to it."""
+        self.flush()
+        self.info_messagebox.emit(title, message)
+
+    def show_critical(self, title, message):
+        """Open an error box from any thread, after the console lines that lead up to it."""
+        self.flush()
+        self.critical_messagebox.emit(title, message)
+
+signal_manager = SignalManager()
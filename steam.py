@@ -0,0 +1,193 @@
+"""DDLC Mod Installer Steam Discovery
+
+Steam roots come from a list of providers: the Windows registry, the usual
+Linux and macOS install locations, and DDMI_STEAM_ROOTS (os.pathsep
+separated). More can be added with register_steam_root_provider. Each
+root's libraryfolders.vdf is parsed with the vdf module, every library is
+probed for DDLC concurrently, and the answer is cached until one of the
+.vdf files changes, so repeat lookups only cost a few stat calls.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import vdf
+from reporting import NULL_REPORTER
+
+DDLC_APP_ID = '698780'
+DDLC_FOLDER = "Doki Doki Literature Club"
+NOT_FOUND = "Game directory not found automatically."
+PROBE_WORKERS = 8
+
+_providers = []
+_cache_lock = threading.Lock()
+# (Steam roots, mtimes of their libraryfolders.vdf) -> game path
+_discovery_cache = {}
+_registry_roots = None
+
+
+def get_steam_path(reporter=NULL_REPORTER):
+    """Find Steam on the System"""
+    try:
+        import winreg  # Windows only, so only imported when the registry is actually read
+        key_path = r"SOFTWARE\Valve\Steam"
+        if os.environ["PROCESSOR_ARCHITECTURE"].endswith('64'):
+            key_path = r"SOFTWARE\Wow6432Node\Valve\Steam"
+        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
+        value, _ = winreg.QueryValueEx(key, "InstallPath")
+        reporter.log(f"Steam Path Value: {value}")
+        return value
+    except Exception as e:
+        reporter.log(f"Error accessing registry: {e}")
+        return None
+
+def register_steam_root_provider(provider):
+    """Add provider(reporter), which returns candidate Steam root directories, to the search."""
+    _providers.append(provider)
+    clear_cache()
+
+def registry_roots(reporter=NULL_REPORTER):
+    """The Steam root from the Windows registry, read once per run."""
+    global _registry_roots
+    if _registry_roots is None:
+        if sys.platform != 'win32' and 'winreg' not in sys.modules:
+            _registry_roots = []
+        else:
+            steam_path = get_steam_path(reporter)
+            _registry_roots = [steam_path] if steam_path else []
+    return _registry_roots
+
+def default_roots(reporter=NULL_REPORTER):
+    """Where Steam usually lives on Linux (native and Flatpak) and macOS."""
+    home = os.path.expanduser('~')
+    return [
+        os.path.join(home, '.steam', 'steam'),
+        os.path.join(home, '.local', 'share', 'Steam'),
+        os.path.join(home, '.var', 'app', 'com.valvesoftware.Steam', '.local', 'share', 'Steam'),
+        os.path.join(home, 'Library', 'Application Support', 'Steam'),
+        ]
+
+def environment_roots(reporter=NULL_REPORTER):
+    return [path for path in os.environ.get('DDMI_STEAM_ROOTS', '').split(os.pathsep) if path]
+
+_providers.extend([environment_roots, registry_roots, default_roots])
+
+def steam_roots(reporter=NULL_REPORTER):
+    """Every existing Steam root from every provider, without duplicates."""
+    roots = []
+    seen = set()
+    for provider in _providers:
+        for path in provider(reporter):
+            if not os.path.isdir(path):
+                continue
+            key = os.path.normcase(os.path.realpath(path))
+            if key not in seen:
+                seen.add(key)
+                roots.append(path)
+    return roots
+
+def library_folders(vdf_path, reporter=NULL_REPORTER):
+    """Return (library path, app ids) for every library listed in a libraryfolders.vdf.
+
+    Understands both the current format, where each library is a block with
+    "path" and "apps", and the old one, where each library is just a path.
+    """
+    try:
+        data = vdf.load(vdf_path)
+    except (OSError, vdf.VDFError) as e:
+        reporter.log(f"Error parsing VDF: {e}")
+        return []
+    libraries = []
+    for key, value in data.get('libraryfolders', {}).items():
+        if isinstance(value, dict):
+            path = value.get('path')
+            apps = value.get('apps', {})
+            if path:
+                libraries.append((path, set(apps) if isinstance(apps, dict) else set()))
+        elif key.isdigit():
+            libraries.append((value, set()))
+    return libraries
+
+def parse_vdf_for_paths(vdf_path, game_ids=None, reporter=NULL_REPORTER):
+    """Find the Game Path in the steam library"""
+    if game_ids is None:
+        game_ids = [DDLC_APP_ID]
+    paths = []
+    for path, apps in library_folders(vdf_path, reporter):
+        if apps.intersection(game_ids) and path not in paths and os.path.exists(path):
+            paths.append(path)
+            reporter.log(f"Found Steam library with game: {path}")
+    reporter.log(f"VDF Paths: {paths}")
+    return paths
+
+def probe_library(library):
+    """Return DDLC's directory inside a Steam library, or None."""
+    install_dir = DDLC_FOLDER
+    manifest = os.path.join(library, 'steamapps', f"appmanifest_{DDLC_APP_ID}.acf")
+    try:
+        install_dir = vdf.load(manifest).get('appstate', {}).get('installdir') or DDLC_FOLDER
+    except (OSError, vdf.VDFError):
+        pass
+    game_path = os.path.join(library, 'steamapps', 'common', install_dir)
+    return game_path if os.path.isdir(game_path) else None
+
+def _vdf_path(root):
+    return os.path.join(root, 'steamapps', 'libraryfolders.vdf')
+
+def _cache_key(roots):
+    mtimes = []
+    for root in roots:
+        try:
+            mtimes.append(os.stat(_vdf_path(root)).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(roots), tuple(mtimes)
+
+def clear_cache():
+    with _cache_lock:
+        _discovery_cache.clear()
+
+def discover(reporter=NULL_REPORTER):
+    """Find DDLC's directory in any Steam library, or return None."""
+    roots = steam_roots(reporter)
+    key = _cache_key(roots)
+    with _cache_lock:
+        cached = _discovery_cache.get(key)
+    if cached is not None and os.path.isdir(cached):
+        reporter.log("Using the cached Steam library scan.")
+        return cached
+
+    # Libraries that list DDLC come first, then the Steam roots, then every other library
+    listed, unlisted = [], []
+    for root in roots:
+        unlisted.append(root)
+        for path, apps in library_folders(_vdf_path(root), reporter):
+            (listed if DDLC_APP_ID in apps else unlisted).append(path)
+    candidates = []
+    seen = set()
+    for path in listed + unlisted:
+        normalized = os.path.normcase(os.path.normpath(path))
+        if normalized not in seen:
+            seen.add(normalized)
+            candidates.append(path)
+    if not candidates:
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(candidates))) as pool:
+        results = list(pool.map(probe_library, candidates))
+    reporter.log(f"Probed {len(candidates)} Steam libraries.")
+    game_path = next((path for path in results if path is not None), None)
+    if game_path is not None:
+        with _cache_lock:
+            _discovery_cache.clear()  # Entries for older .vdf mtimes can never match again
+            _discovery_cache[key] = game_path
+    return game_path
+
+def find_game_directory(reporter=NULL_REPORTER):
+    """Find the Directory of DDLC"""
+    game_path = discover(reporter)
+    if game_path is not None:
+        reporter.log(f"Game Path: {game_path}")
+        return game_path
+    # Return an informative string or empty if not found
+    return NOT_FOUND
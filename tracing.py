@@ -0,0 +1,192 @@
+"""DDLC Mod Installer Tracing
+
+Every install records a span per phase (scanning, planning, extracting,
+copying, ...) and per large file, with the bytes and files it handled. When
+the install ends the spans are written as a Chrome trace-event JSON file,
+which chrome://tracing or https://ui.perfetto.dev can open, and a summary
+table goes to the console.
+
+Setting DDMI_PROFILE=1 also runs the install under cProfile and saves the
+stats next to the trace.
+
+The active tracer lives in a context variable, so code that records spans
+does not need one passed in. Thread pools must run their tasks through
+submit() to carry it over to the worker threads.
+"""
+import os
+import json
+import time
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from settings import data_dir
+
+PHASE = 'phase'
+FILE = 'file'
+# Files at least this big get a span of their own
+LARGE_FILE_SIZE = 16 * 1024 * 1024
+KEEP_TRACES = 20
+
+_current = contextvars.ContextVar('ddmi_tracer', default=None)
+_trace_numbers = itertools.count(1)
+
+
+class Span:
+    """One timed piece of work, with the bytes and files it handled."""
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.files = 0
+        self.bytes = 0
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end = None
+
+    def add(self, files=0, size=0):
+        self.files += files
+        self.bytes += size
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+class Tracer:
+    """Collects the spans of one install; spans may be recorded from any thread."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.origin = time.perf_counter()
+        self.wall_start = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category=PHASE, files=0, size=0, **args):
+        span = Span(name, category, args)
+        span.add(files, size)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            with self._lock:
+                self.spans.append(span)
+
+    def chrome_trace(self):
+        """The spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            args = dict(span.args, files=span.files, bytes=span.bytes)
+            events.append({
+                'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round((span.start - self.origin) * 1e6), 'dur': round(span.duration * 1e6), 'args': args,
+                })
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'install': self.name}}
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file)
+
+    def summary_lines(self):
+        """A table of the phases with their time, size and throughput."""
+        lines = [f"{'Phase':<20} {'Time':>9} {'Files':>7} {'MB':>9} {'MB/s':>8} {'files/s':>8}"]
+        for span in sorted((span for span in self.spans if span.category == PHASE), key=lambda span: span.start):
+            duration = span.duration
+            rate = duration or float('inf')
+            lines.append(
+                f"{span.name:<20} {duration:>8.2f}s {span.files:>7} {span.bytes / 1048576:>9.1f} "
+                f"{span.bytes / 1048576 / rate:>8.1f} {span.files / rate:>8.0f}")
+        lines.append(f"{'Total':<20} {time.perf_counter() - self.origin:>8.2f}s")
+        return lines
+
+
+class _NullSpan:
+    files = bytes = 0
+
+    def add(self, files=0, size=0):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def span(name, category=PHASE, files=0, size=0, **args):
+    """Record a span on the active tracer; does nothing outside of trace_install."""
+    tracer = _current.get()
+    if tracer is None:
+        yield _NULL_SPAN
+        return
+    with tracer.span(name, category, files, size, **args) as active:
+        yield active
+
+@contextmanager
+def file_span(path, size):
+    """Record a span for one file if it is large enough to be worth seeing in the trace."""
+    if size < LARGE_FILE_SIZE:
+        yield _NULL_SPAN
+        return
+    with span(os.path.basename(path), FILE, 1, size, path=path) as active:
+        yield active
+
+def submit(pool, function, *args):
+    """pool.submit, with the active tracer (and install control) carried over to the worker thread."""
+    return pool.submit(contextvars.copy_context().run, function, *args)
+
+def trace_dir():
+    """Where install traces are kept; DDMI_TRACE_DIR overrides it."""
+    path = os.environ.get('DDMI_TRACE_DIR') or os.path.join(data_dir(), 'traces')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _prune_traces(directory):
+    traces = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.startswith('install-')),
+        key=lambda entry: entry.stat().st_mtime)
+    for entry in traces[:-KEEP_TRACES * 2]:  # A trace and maybe a profile per install
+        os.remove(entry.path)
+
+@contextmanager
+def trace_install(name, reporter):
+    """Trace everything done inside the block as one install.
+
+    Afterwards, even if the install failed, the trace is saved and the
+    phase summary is logged to reporter.
+    """
+    tracer = Tracer(name)
+    token = _current.set(tracer)
+    profile = None
+    if os.environ.get('DDMI_PROFILE'):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None  # Another install in this process is already being profiled
+    try:
+        yield tracer
+    finally:
+        if profile is not None:
+            profile.disable()
+        _current.reset(token)
+        try:
+            directory = trace_dir()
+            base = os.path.join(
+                directory, f"install-{time.strftime('%Y%m%d-%H%M%S', time.localtime(tracer.wall_start))}"
+                f"-{os.getpid()}-{next(_trace_numbers)}")
+            tracer.write(base + '.json')
+            reporter.log("\n".join(tracer.summary_lines()))
+            reporter.log(f"Trace written to: {base}.json")
+            if profile is not None:
+                profile.dump_stats(base + '.prof')
+                reporter.log(f"Profile written to: {base}.prof")
+            _prune_traces(directory)
+        except OSError as e:
+            reporter.log(f"Warning: could not write the install trace: {e}")
@@ -1,58 +1,108 @@
 """DDLC Mod Installer Utils"""
 import os
-import zipfile
-import shutil
-import winreg
-import subprocess
-from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import QThread, QObject, Signal, Qt
+from PySide6.QtWidgets import QMessageBox
+from PySide6.QtCore import QThread
 from signal_manager import signal_manager
 
+# The install engine and Steam discovery are imported where they are first
+# used, so that starting the GUI only pays for Qt.
+
 class InstallThread(QThread):
     # Signal to update the console from the thread
-    def __init__(self, zip_path, game_path, separate_mod_path, main_window):
+    def __init__(self, zip_path, game_path, separate_mod_path, main_window, use_store=False, install_control=None):
         QThread.__init__(self)
         self.zip_path = zip_path
         self.game_path = game_path
         self.separate_mod_path = separate_mod_path
         self.main_window = main_window
+        self.use_store = use_store
+        self.install_control = install_control
     def run(self):
         try:
             # Call your processing function here
-            process_files(self.main_window, self.zip_path, self.game_path, self.separate_mod_path)
+            process_files(self.main_window, self.zip_path, self.game_path, self.separate_mod_path,
+                          use_store=self.use_store, install_control=self.install_control)
         except Exception as e:
-            signal_manager.console_update.emit(f"Error: {e}")
-
-
-
-def calculate_directory_size(path):
-    """Calculate the total size of all files in the directory."""
-    total_size = 0
-    for root, dirs, files in os.walk(path):
-        total_size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
-    return total_size
+            signal_manager.log(f"Error: {e}")
 
-def delete_directory_with_progress(path, total_size, deleted_size=None):
-    """Delete a directory and its contents, updating the progress bar."""
-    if deleted_size is None:
-        deleted_size=[0]
-    if not os.path.exists(path):
-        return
-
-    for root, dirs, files in os.walk(path, topdown=False):
-        for name in files:
-            file_path = os.path.join(root, name)
-            file_size = os.path.getsize(file_path)
-            os.remove(file_path)
-            deleted_size[0] += file_size
-            signal_manager.progress_update.emit((deleted_size[0] / total_size) * 100)
+class DeleteThread(QThread):
+    """Delete the game directory off the GUI thread."""
+    def __init__(self, game_path):
+        QThread.__init__(self)
+        self.game_path = game_path
+        self.succeeded = False
+    def run(self):
+        import installer
+        from inventory import FileInventory
+        try:
+            inventory = FileInventory.scan(self.game_path)
+            installer.delete_directory_with_progress(
+                self.game_path, inventory.total_size, inventory=inventory, reporter=signal_manager)
+            self.succeeded = True
+            signal_manager.log(f"DDLC has been uninstalled successfully from: {self.game_path}")
+            signal_manager.show_info("Uninstall Complete", "DDLC has been successfully uninstalled.")
+        except Exception as e:
+            signal_manager.log(f"Error during uninstallation: {e}")
+            signal_manager.show_critical("Error", f"Failed to uninstall DDLC. {e}")
 
+class VerifyThread(QThread):
+    """Check an installed mod against its archive off the GUI thread."""
+    def __init__(self, zip_path, destination_path):
+        QThread.__init__(self)
+        self.zip_path = zip_path
+        self.destination_path = destination_path
+    def run(self):
+        import verify
+        try:
+            report = verify.verify_install(self.zip_path, self.destination_path, reporter=signal_manager)
+        except Exception as e:
+            signal_manager.log(f"Error during verification: {e}")
+            signal_manager.show_critical("Error", f"Could not verify the installation. {e}")
+            return
+        summary = "\n".join(verify.describe_report(report))
+        signal_manager.log(summary)
+        if report.failed:
+            signal_manager.show_critical("Verification Failed", summary)
+        else:
+            signal_manager.show_info("Verification Passed", summary)
 
-        for name in dirs:
-            os.rmdir(os.path.join(root, name))
+class PreviewThread(QThread):
+    """Plan an install and log what it would do off the GUI thread, since planning walks the game tree."""
+    def __init__(self, zip_path, game_path, separate_mod_path):
+        QThread.__init__(self)
+        self.zip_path = zip_path
+        self.game_path = game_path
+        self.separate_mod_path = separate_mod_path
+    def run(self):
+        import time
+        from planner import plan_install
+        start = time.perf_counter()
+        try:
+            plan = plan_install(self.zip_path, self.game_path, self.separate_mod_path)
+        except Exception as e:
+            signal_manager.log(f"Error while planning install: {e}")
+            return
+        lines = plan.describe()
+        if plan.mod_root is not None:
+            import rpa
+            lines += rpa.describe_changes(plan)
+        lines.append(f"Planned in {(time.perf_counter() - start) * 1000:.0f} ms")
+        signal_manager.log("\n".join(lines))
+
+class PurgeThread(QThread):
+    """Purge renamed-away game directories in the background."""
+    def __init__(self, tombstones):
+        QThread.__init__(self)
+        self.tombstones = tombstones
+    def run(self):
+        import purge
+        for tombstone in self.tombstones:
+            try:
+                files, size = purge.purge_tombstone(tombstone)
+                signal_manager.log(f"Purged {files} files ({size / (1024 * 1024):.1f} MB) from: {tombstone}")
+            except Exception as e:
+                signal_manager.log(f"Error while purging {tombstone}: {e}")
 
-    os.rmdir(path)  # Finally, remove the root directory itself
-    signal_manager.progress_update.emit(100) # Ensure it reaches 100% at the end
 
 
 def yesno_messagebox(main_window, title, message):
@@ -89,17 +139,17 @@ def delete_ddlc(game_path, main_window):
 
     # Check if the path is empty
     if not game_path:
-        signal_manager.critical_messagebox.emit( "Error", "Game directory is empty. Please specify a valid path.")
+        signal_manager.show_critical("Error", "Game directory is empty. Please specify a valid path.")
         return
 
     # Safeguard checks to ensure the directory is indeed for DDLC
     valid_names = ["Doki Doki Literature Club"]
     if not any(name in game_path for name in valid_names):
-        signal_manager.critical_messagebox.emit(
+        signal_manager.show_critical(
             "Error", 
             "The specified directory does not appear to be a valid DDLC installation."
             )
-        signal_manager.console_update.emit("Error: Attempted to delete a non-DDLC directory.")
+        signal_manager.log("Error: Attempted to delete a non-DDLC directory.")
         return
 
     # Check for existence of expected game files as an extra precaution
@@ -108,10 +158,13 @@ def delete_ddlc(game_path, main_window):
         os.path.exists(
             os.path.join(game_path, expected_file)
         ) for expected_file in expected_files):
-        signal_manager.critical_messagebox.emit(
+        signal_manager.show_critical(
             "Error",
             "The specified directory does not contain expected DDLC files.")
-        signal_manager.console_update.emit("Error: The specified directory lacks expected DDLC files.")
+        signal_manager.log("Error: The specified directory lacks expected DDLC files.")
+        return
+
+    if queue_conflict(main_window, "uninstall DDLC", writes=[game_path]):
         return
 
     # Confirmation dialog
@@ -119,293 +172,131 @@ def delete_ddlc(game_path, main_window):
                                "Are you sure you want to Uninstall DDLC? This action cannot be undone!")
 
     if confirm == QMessageBox.Yes:
+        import purge
         try:
-            total_size = calculate_directory_size(game_path)
-            # Assuming show_progressbar and other functions are adapted for PySide6 as well
-            show_progressbar(main_window)  # Initialize progress bar
-            delete_directory_with_progress(game_path, total_size)
-            signal_manager.console_update.emit(f"DDLC has been uninstalled successfully from: {game_path}")
-            signal_manager.info_messagebox.emit("Uninstall Complete", "DDLC has been successfully uninstalled.")
+            # Renaming frees the path immediately; the files are purged in the background
+            tombstone = purge.move_to_tombstone(game_path)
+        except OSError as e:
+            signal_manager.log(f"Could not move the game directory aside ({e}), deleting it in place.")
+        else:
+            signal_manager.log(f"DDLC has been uninstalled successfully from: {game_path}")
             main_window.game_path_entry.clear()  # Assuming main_window.game_path_entry is a QLineEdit
-        except Exception as e:
-            signal_manager.console_update.emit(f"Error during uninstallation: {e}")
-            signal_manager.critical_messagebox.emit( "Error", f"Failed to uninstall DDLC. {e}")
+            start_purge(main_window, [tombstone])
+            signal_manager.show_info("Uninstall Complete", "DDLC has been successfully uninstalled.")
+            return
+        show_progressbar(main_window)  # Initialize progress bar
+        disable_ui_elements(main_window)
+        main_window.delete_thread = DeleteThread(game_path)
+        main_window.delete_thread.finished.connect(lambda: delete_finished(main_window))
+        main_window.delete_thread.start()
     else:
-        signal_manager.console_update.emit("Uninstallation cancelled.")
+        signal_manager.log("Uninstallation cancelled.")
 
+def verify_installation(zip_path, destination_path, main_window):
+    """Verify the files a mod installed into destination_path on a VerifyThread."""
+    if not zip_path or not destination_path:
+        signal_manager.show_critical("Error", "Please specify both the ZIP file and the install directory.")
+        return
+    if queue_conflict(main_window, "verify the installation", reads=[destination_path]):
+        return
+    show_progressbar(main_window)
+    disable_ui_elements(main_window)
+    main_window.verify_thread = VerifyThread(zip_path, destination_path)
+    main_window.verify_thread.finished.connect(lambda: verify_finished(main_window))
+    main_window.verify_thread.start()
+
+def preview_install(zip_path, game_path, separate_mod_path, main_window):
+    """Log the install plan of a mod, worked out on a PreviewThread."""
+    disable_ui_elements(main_window)
+    main_window.preview_thread = PreviewThread(zip_path, game_path, separate_mod_path)
+    main_window.preview_thread.finished.connect(lambda: preview_finished(main_window))
+    main_window.preview_thread.start()
+
+def preview_finished(main_window):
+    """Restore the UI once the PreviewThread is done."""
+    signal_manager.flush()
+    enable_ui_elements(main_window)
 
-def get_steam_path():
-    """Find Steam on the System"""
-    try:
-        key_path = r"SOFTWARE\Valve\Steam"
-        if os.environ["PROCESSOR_ARCHITECTURE"].endswith('64'):
-            key_path = r"SOFTWARE\Wow6432Node\Valve\Steam"
-        key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ)
-        value, _ = winreg.QueryValueEx(key, "InstallPath")
-        signal_manager.console_update.emit(f"Steam Path Value: {value}")
-        return value
-    except Exception as e:
-        signal_manager.console_update.emit(f"Error accessing registry: {e}")
-        return None
-
-def parse_vdf_for_paths(vdf_path, game_ids=None):
-    """Find the Game Path in the steam library"""
-    if game_ids is None:
-        game_ids=['698780']
-    paths = []
-    try:
-        with open(vdf_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        current_path = ""
-        in_apps_block = False
-        for line in lines:
-            # Strip line of whitespace for cleaner processing
-            stripped_line = line.strip()
-            if '"path"' in stripped_line:
-                # Extract path value
-                current_path = stripped_line.split('"')[3].replace('\\\\', '\\')
-            if '"apps"' in stripped_line:
-                in_apps_block = True
-            elif in_apps_block:
-                if any(game_id in stripped_line for game_id in game_ids):
-                    # Found a game ID, add the current path if it's not already added
-                    if current_path and current_path not in paths and os.path.exists(current_path):
-                        paths.append(current_path)
-                        signal_manager.console_update.emit(f"Found Steam library with game: {current_path}")
-                        # Reset for next library
-                        current_path = ""
-                        in_apps_block = False
-                elif '}' in stripped_line:
-                    # Exiting the apps block
-                    in_apps_block = False
-                    current_path = ""  # Reset current path after exiting an apps block
-
-    except Exception as e:
-        signal_manager.console_update.emit(f"Error parsing VDF: {e}")
-    signal_manager.console_update.emit(f"VDF Paths: {paths}")
-    return paths
+def verify_finished(main_window):
+    """Restore the UI once the VerifyThread is done."""
+    signal_manager.flush()
+    enable_ui_elements(main_window)
 
+def queue_conflict(main_window, action, writes=(), reads=()):
+    """Show an error and return True if queued installs still use a directory that action writes or reads."""
+    jobs = main_window.queue_widget.queue.conflicting(writes, reads)
+    if not jobs:
+        return False
+    numbers = ", ".join(f"#{job.number}" for job in jobs)
+    signal_manager.show_critical(
+        "Error", f"Cannot {action} while queued installs ({numbers}) use the same directory. "
+                 "Wait for them to finish or cancel them first.")
+    return True
+
+def start_purge(main_window, tombstones):
+    """Purge tombstones on a PurgeThread, without blocking the UI."""
+    thread = PurgeThread(tombstones)
+    if not hasattr(main_window, 'purge_threads'):
+        main_window.purge_threads = []
+    main_window.purge_threads.append(thread)
+    thread.finished.connect(lambda: main_window.purge_threads.remove(thread))
+    thread.start()
+
+def resume_pending_purges(main_window):
+    """Finish purging game directories left over from an earlier session."""
+    import purge
+    tombstones = purge.pending_tombstones()
+    if tombstones:
+        signal_manager.log(f"Resuming cleanup of {len(tombstones)} deleted game directories.")
+        start_purge(main_window, tombstones)
+
+def delete_finished(main_window):
+    """Restore the UI once the DeleteThread is done."""
+    signal_manager.flush()
+    enable_ui_elements(main_window)
+    if main_window.delete_thread.succeeded:
+        main_window.game_path_entry.clear()  # Assuming main_window.game_path_entry is a QLineEdit
 
-def calculate_total_size(zip_path):
-    """Get total size of zip"""
-    total_size = 0
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        for file_info in zip_ref.infolist():
-            total_size += file_info.file_size
-    return total_size
 
 def find_game_directory():
     """Find the Directory of DDLC"""
-    steam_path = get_steam_path()
-    if steam_path:
-        vdf_path = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
-        library_paths = parse_vdf_for_paths(vdf_path)
-        library_paths.insert(0, steam_path)  # Include the default path
-        for path in library_paths:
-            for game_folder in ["Doki Doki Literature Club"]:
-                game_path = os.path.join(path, "steamapps", "common", game_folder)
-                signal_manager.console_update.emit(f"Game Path: {game_path}")
-                if os.path.exists(game_path):
-                    return game_path
-    # Return an informative string or empty if not found
-    return "Game directory not found automatically."
-
-def merge_directories(src, dst, processed_size, destination_path, total_size):
-    """Merge directories from src to dst, overwriting conflicts, and update progress bar."""
-    dst = os.path.join(destination_path, dst)  # Adjust destination based on user choice
-    for root, dirs, files in os.walk(src):
-        # Calculate relative path to the source directory
-        rel_path = os.path.relpath(root, src)
-        dst_path = os.path.join(dst, rel_path)
-
-        # Ensure the destination directory exists
-        os.makedirs(dst_path, exist_ok=True)
-
-        # Copy and overwrite files
-        for file in files:
-            src_file_path = os.path.join(root, file)
-            dst_file_path = os.path.join(dst_path, file)
-            file_size = os.path.getsize(src_file_path)
-            if os.path.exists(dst_file_path):
-                signal_manager.console_update.emit(f"Overwriting file: {dst_file_path}")
-            else:
-                signal_manager.console_update.emit(f"Copying file: {dst_file_path}")
-            shutil.copy2(src_file_path, dst_file_path)
-            processed_size[0] += file_size  # Update processed size
-            progress_percentage = (processed_size[0] / total_size) * 100
-            signal_manager.progress_update.emit(progress_percentage)  # Update progress bar
-
-def overwrite_file(src, dst, processed_size, destination_path, total_size):
-    """Overwrite the file at dst with src, within the destination path."""
-    dst = os.path.join(destination_path, dst)  # Adjust destination path
-    file_size = os.path.getsize(src)
-    if os.path.exists(dst):
-        os.remove(dst)
-        signal_manager.console_update.emit(f"Removed existing file: {dst}")
-    shutil.copy2(src, dst)
-    signal_manager.console_update.emit(f"Copied {src} to {dst}")
-    processed_size[0] += file_size
-    signal_manager.progress_update.emit((processed_size[0] / total_size) * 100)
-
-def process_files(main_window, zip_path, game_path, separate_mod_path=None):
-    """Process files and directories with explicit handling for overwriting."""
-    open_dir = False
-    signal_manager.console_update.emit(f"Processing files from: {zip_path} to {game_path}")
+    import steam
+    return steam.find_game_directory(signal_manager)
 
-    if not zip_path.lower().endswith('.zip'):
-        signal_manager.console_update.emit("Error: The provided path does not point to a zip file.")
-        return
+def process_files(main_window, zip_path, game_path, separate_mod_path=None, direct=None, use_store=False,
+                  install_control=None):
+    """Install a mod from the GUI, reporting through the signal manager.
 
+    Runs on the InstallThread; the window re-enables itself when the thread finishes.
+    """
+    import installer
+    from control import InstallCancelled
+    open_dir = False
     destination_path = separate_mod_path if separate_mod_path else game_path
-    game_dir_size = calculate_directory_size(game_path)
-    mod_file_size = calculate_total_size(zip_path)
-    total_size = game_dir_size + mod_file_size
-    if total_size is None:
-        total_size = 100
     try:
-
-        # Initialize progress tracking
-        processed_size = [0]
-
-        # Adjust progress bar initialization
-
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            extract_path = os.path.splitext(zip_path)[0]
-            try:
-                zip_ref.extractall(extract_path)
-                signal_manager.console_update.emit(f"Extracted zip to: {extract_path}")
-            except PermissionError:
-                signal_manager.console_update.emit("Warning: Permission denied during extraction.")
-                return
-        if separate_mod_path is not None:
-            copy_game_files(
-                game_path,
-                separate_mod_path,
-                processed_size,
-                total_size)
-        open_dir = process_extracted_files(
-            extract_path,
-            destination_path,
-            processed_size,
-            total_size,
-            destination_path
-
-            )
-
+        open_dir = installer.install_mod(
+            zip_path, game_path, separate_mod_path, direct, reporter=signal_manager, use_store=use_store,
+            install_control=install_control)
+    except InstallCancelled:
+        signal_manager.log("Install cancelled; undoing the files it already wrote.")
+        installer.rollback_install(destination_path, signal_manager)
+        return
+    except installer.InstallError as e:
+        signal_manager.log(f"Error: {e}")
+        return
     except Exception as e:
-        signal_manager.console_update.emit(f"Error during processing: {e}")
-        signal_manager.critical_messagebox.emit("Error", f"An error occurred: {e}")
+        signal_manager.log(f"Error during processing: {e}")
+        signal_manager.show_critical("Error", f"An error occurred: {e}")
 
-    signal_manager.progress_update.emit(100)  # Ensure progress bar reaches 100% at the end
-    enable_ui_elements(main_window)
-    signal_manager.info_messagebox.emit("Process Completed", "All files have been processed successfully.")
+    signal_manager.report_progress(100)  # Ensure progress bar reaches 100% at the end
+    signal_manager.show_info("Process Completed", "All files have been processed successfully.")
     if open_dir:
         destination_path_abs = os.path.abspath(destination_path)
         if os.path.exists(destination_path):  # Make sure the path exists before trying to open it
+            import subprocess
             subprocess.run(['explorer', destination_path_abs], check=True)
         else:
-            signal_manager.critical_messagebox.emit("Error", "The specified path does not exist.")
-    app.config(cursor="")
-
-def copy_game_files(game_path, destination_path, processed_size, total_size):
-    """Copy all game files to the destination directory and update progress."""
-    for item in os.listdir(game_path):
-        src_path = os.path.join(game_path, item)
-        dst_path = os.path.join(destination_path, item)
-        if os.path.isdir(src_path):
-            for root, dirs, files in os.walk(src_path):
-                for file in files:
-                    file_src_path = os.path.join(root, file)
-                    file_dst_path = os.path.join(dst_path, os.path.relpath(root, src_path), file)
-                    os.makedirs(os.path.dirname(file_dst_path), exist_ok=True)
-                    shutil.copy2(file_src_path, file_dst_path)
-                    file_size = os.path.getsize(file_src_path)
-                    processed_size[0] += file_size
-                    progress_percentage = (processed_size[0] / total_size) * 100
-                    signal_manager.progress_update.emit(progress_percentage)
-
-        else:
-            if not os.path.exists(os.path.dirname(dst_path)):
-                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-            shutil.copy2(src_path, dst_path)
-            file_size = os.path.getsize(src_path)
-            processed_size[0] += file_size
-            progress_percentage = (processed_size[0] / total_size) * 100
-            signal_manager.progress_update.emit(progress_percentage)
-
-    signal_manager.console_update.emit(f"Copied game files to: {destination_path}")
-
-def process_extracted_files(
-        extract_path,
-        game_path,
-        processed_size,
-        total_size,
-        destination_path=None):
-    """Process Game files after zip extraction."""
-    open_dir = False
-    target_files = ['audio.rpa', 'fonts.rpa', 'images.rpa', 'scripts.rpa']
-    target_dirs = ['game', 'characters', 'lib', 'renpy']
-    executable_extensions = ['.exe', '.bat', '.sh', '.py']
-
-    if destination_path is None:
-        destination_path = game_path  # Use game path if no separate mod path is provided
-
-    # Find the directory that contains any of the target directories or files
-    for root, dirs, files in os.walk(extract_path):
-        # Check if any of the target directories or target files are present in the current 'root'
-        if any(
-            t_dir in dirs for t_dir in target_dirs
-              ) or any(
-                t_file in files for t_file in target_files
-                ):
-            base_dir = root
-            break
-    else:
-        signal_manager.console_update.emit("None of the target directories or files found in the extracted path.")
-        return open_dir
-
-    # Process files and directories from the found base directory
-    for root, dirs, files in os.walk(base_dir, topdown=True):
-        # Files processing
-        for name in files:
-            src_path = os.path.join(root, name)
-            # Determine if the file is an executable or script and handle accordingly
-            if any(name.lower().endswith(ext) for ext in executable_extensions):
-                # Executables go directly to destination_path
-                dst_path = name
-                signal_manager.console_update.emit(f"Moving executable/script: {name}")
-                overwrite_file(
-                    src_path,
-                    dst_path,
-                    processed_size,
-                    destination_path,
-                    total_size)
-                if name.lower().endswith('.exe'):
-                    open_dir = True
-            elif name in target_files:
-                # Target files go to 'game' directory inside destination_path
-                dst_path = os.path.join('game', name)
-                signal_manager.console_update.emit(f"Moving target file: {name} to {dst_path}")
-                overwrite_file(
-                src_path,
-                dst_path,
-                processed_size,
-                destination_path,
-                total_size)
-
-        # Directories processing
-        for name in dirs:
-            src_path = os.path.join(root, name)
-            if name in target_dirs or name.endswith('.app'):
-                # Target directories are copied to the destination_path
-                signal_manager.console_update.emit(f"Copying directory: {name}")
-                merge_directories(src_path, name, processed_size, destination_path, total_size)
-
-        # Modify dirs list to exclude the target directories since they are already processed
-        dirs[:] = [d for d in dirs if d not in target_dirs and not d.endswith('.app')]
-
-    return open_dir
+            signal_manager.show_critical("Error", "The specified path does not exist.")
 
 
 
@@ -423,11 +314,13 @@ def check_changed(state, main_window):
         main_window.mod_path_label.setVisible(True)
         main_window.mod_path_entry.setVisible(True)
         main_window.mod_path_browse_button.setVisible(True)
+        main_window.store_checkbox.setVisible(True)
     else:
         main_window.mod_path_entry.clear()
         main_window.mod_path_label.setVisible(False)
         main_window.mod_path_entry.setVisible(False)
         main_window.mod_path_browse_button.setVisible(False)
+        main_window.store_checkbox.setVisible(False)
 
 def disable_ui_elements(main_window):
     """Disable all UI elements."""
@@ -435,6 +328,9 @@ def disable_ui_elements(main_window):
     main_window.game_path_browse_button.setEnabled(False)
     main_window.auto_button.setEnabled(False)
     main_window.process_button.setEnabled(False)
+    main_window.queue_button.setEnabled(False)
+    main_window.preview_button.setEnabled(False)
+    main_window.verify_button.setEnabled(False)
     main_window.delete_button.setEnabled(False)
 
 def enable_ui_elements(main_window):
@@ -443,6 +339,9 @@ def enable_ui_elements(main_window):
     main_window.game_path_browse_button.setEnabled(True)
     main_window.auto_button.setEnabled(True)
     main_window.process_button.setEnabled(True)
+    main_window.queue_button.setEnabled(True)
+    main_window.preview_button.setEnabled(True)
+    main_window.verify_button.setEnabled(True)
     main_window.delete_button.setEnabled(True)
 
 def show_progressbar(main_window):
@@ -0,0 +1,109 @@
+"""Valve KeyValues (VDF) Parser
+
+Reads the text KeyValues format Steam uses for libraryfolders.vdf and the
+appmanifest_*.acf files:
+
+    "libraryfolders"
+    {
+        "0"
+        {
+            "path"      "C:\\\\Program Files (x86)\\\\Steam"
+            "apps"      { "698780" "1234" }
+        }
+    }
+
+Keys and values may be quoted or bare, // starts a comment and [$WIN32]
+style platform conditionals are skipped. Keys are matched without regard to
+case, like Steam does, by lower-casing them; a key given twice keeps its
+last value.
+"""
+
+ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'}
+OPEN = '{'
+CLOSE = '}'
+
+
+class VDFError(ValueError):
+    """Text that is not valid KeyValues."""
+
+
+def tokenize(text):
+    """Yield (kind, value, line) tokens; kind is 'string', '{' or '}'."""
+    index = 0
+    line = 1
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == '\n':
+            line += 1
+            index += 1
+        elif char.isspace():
+            index += 1
+        elif text.startswith('//', index):
+            end = text.find('\n', index)
+            index = length if end == -1 else end
+        elif char in (OPEN, CLOSE):
+            yield char, char, line
+            index += 1
+        elif char == '[':
+            # Platform conditional such as [$WIN32]; DDMI does not need them
+            end = text.find(']', index)
+            if end == -1:
+                raise VDFError(f"Unterminated conditional on line {line}")
+            index = end + 1
+        elif char == '"':
+            start_line = line
+            index += 1
+            parts = []
+            while True:
+                if index >= length:
+                    raise VDFError(f"Unterminated string starting on line {start_line}")
+                char = text[index]
+                if char == '"':
+                    index += 1
+                    break
+                if char == '\\' and index + 1 < length and text[index + 1] in ESCAPES:
+                    parts.append(ESCAPES[text[index + 1]])
+                    index += 2
+                    continue
+                if char == '\n':
+                    line += 1
+                parts.append(char)
+                index += 1
+            yield 'string', ''.join(parts), start_line
+        else:
+            start = index
+            while index < length and not text[index].isspace() and text[index] not in '{}"':
+                index += 1
+            yield 'string', text[start:index], line
+
+def loads(text):
+    """Parse KeyValues text into nested dicts of lower-cased keys and string values."""
+    root = {}
+    stack = [root]
+    key = None
+    for kind, value, line in tokenize(text.lstrip('\ufeff')):
+        if kind == OPEN:
+            if key is None:
+                raise VDFError(f"'{{' without a key on line {line}")
+            block = {}
+            stack[-1][key] = block
+            stack.append(block)
+            key = None
+        elif kind == CLOSE:
+            if key is not None or len(stack) == 1:
+                raise VDFError(f"Unexpected '}}' on line {line}")
+            stack.pop()
+        elif key is None:
+            key = value.lower()
+        else:
+            stack[-1][key] = value
+            key = None
+    if key is not None or len(stack) != 1:
+        raise VDFError("Unexpected end of file")
+    return root
+
+def load(path):
+    """Parse a KeyValues file."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return loads(file.read())
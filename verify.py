@@ -0,0 +1,92 @@
+"""DDLC Mod Installer Verification
+
+Checks an existing install against the mod archive it came from: every
+file the archive would place is read back and its CRC-32 compared with the
+one the zip stores for that member, on a pool of reader threads (crc32
+releases the GIL). Files that pass are recorded in the destination's
+install manifest, so the next install of the archive can skip them without
+hashing them again.
+"""
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import archive_sources
+from copy_engine import DEFAULT_WORKERS
+from manifest import InstallManifest, file_crc32
+from planner import detect_mod_root, member_targets
+from reporting import NULL_REPORTER
+
+PASSED = 'passed'
+CHANGED = 'changed'
+MISSING = 'missing'
+
+FileCheck = namedtuple('FileCheck', ['target', 'status', 'detail'])
+# passed holds targets, failed the FileChecks of files that did not pass
+VerifyReport = namedtuple('VerifyReport', ['passed', 'failed'])
+
+
+class VerifyError(ValueError):
+    """An archive that cannot be verified against, such as a tar archive (tar stores no checksums)."""
+
+
+def check_file(path, target, info):
+    """FileCheck of the file at path against the zip member it was written from."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return FileCheck(target, MISSING, "not found")
+    if size != info.file_size:
+        return FileCheck(target, CHANGED, f"size {size}, expected {info.file_size}")
+    crc = file_crc32(path)
+    if crc != info.CRC:
+        return FileCheck(target, CHANGED, f"CRC-32 {crc:08x}, expected {info.CRC:08x}")
+    return FileCheck(target, PASSED, None)
+
+def verify_install(zip_path, destination_path, workers=None, reporter=NULL_REPORTER):
+    """Compare every file a mod zip installs into destination_path with the zip. Returns a VerifyReport."""
+    if archive_sources.archive_extension(zip_path) != '.zip':
+        raise VerifyError("Only zip archives store the checksums an install can be verified against.")
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+    detection = detect_mod_root((info.filename, info.is_dir()) for info in infos)
+    if detection.root is None:
+        raise VerifyError("None of the target directories or files found in the zip file.")
+
+    # Last entry wins when an archive lists a path twice, as it does on install
+    targets = {}
+    for info, target in member_targets(infos, detection.root):
+        if not info.is_dir():
+            targets[os.path.normcase(target)] = (target, info)
+    checks = sorted(targets.values(), key=lambda item: -item[1].file_size)
+    total_size = sum(info.file_size for _, info in checks) or 1
+    reporter.log(f"Verifying {len(checks)} files in {destination_path} against {zip_path}")
+
+    install_manifest = InstallManifest.load(destination_path)
+    report = VerifyReport([], [])
+    bytes_read = 0
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS) as pool:
+        futures = {
+            pool.submit(check_file, os.path.join(destination_path, target), target, info): info
+            for target, info in checks
+            }
+        for future in as_completed(futures):
+            info = futures[future]
+            check = future.result()
+            if check.status == PASSED:
+                report.passed.append(check.target)
+                install_manifest.record(check.target, info.CRC)
+            else:
+                report.failed.append(check)
+                reporter.log(f"{check.status.upper()}: {check.target} ({check.detail})")
+            bytes_read += info.file_size
+            reporter.report_progress((bytes_read / total_size) * 100)
+    install_manifest.save()
+    return report
+
+def describe_report(report):
+    """Console lines with the pass/fail summary of a VerifyReport."""
+    missing = sum(1 for check in report.failed if check.status == MISSING)
+    verdict = "PASSED" if not report.failed else "FAILED"
+    return [f"Verification {verdict}: {len(report.passed)} files match, "
+            f"{len(report.failed) - missing} differ, {missing} missing."]
@@ -0,0 +1,244 @@
+"""DDLC Mod Installer Zip Member Writer
+
+Writes zip members to disk from a read-only memory map of the archive.
+Stored members (already compressed .rpa and .ogg content is usually stored)
+are written as memoryview slices of the map without being copied through
+Python at all; deflated members are inflated from slices of the map into
+output chunks of a fixed size. Mapped pages are released as soon as they
+are written, so memory use stays flat however large a member is.
+
+zlib and crc32 release the GIL, so members are inflated on a pool of
+threads, each with its own ZipFile handle and map of the archive.
+
+The CRC-32 of every member is computed from the bytes as they are written
+and checked against the one the zip stores, so a written file never has to
+be read back to be verified. A member that fails the check, or whose
+destination is briefly locked (as virus scanners do), is written again; the
+members that still fail are listed in the WriteReport extract_members
+returns.
+"""
+import os
+import time
+import mmap
+import zlib
+import struct
+import zipfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import tracing
+import control
+from copy_engine import unshare, stop_pending
+
+CHUNK_SIZE = 8 * 1024 * 1024
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+PAGE_SIZE = getattr(mmap, 'PAGESIZE', 4096)
+# Inflating is CPU bound, so one worker per core
+DEFAULT_WORKERS = os.cpu_count() or 1
+WRITE_ATTEMPTS = 3
+RETRY_DELAY = 0.25
+# Failures worth writing a member again for: a CRC or size mismatch, or a locked destination
+RETRY_ERRORS = (zipfile.BadZipFile, PermissionError)
+
+ExtractJob = namedtuple('ExtractJob', ['info', 'dst', 'size'])
+# written and retried are ExtractJobs; failed holds (ExtractJob, exception) pairs
+WriteReport = namedtuple('WriteReport', ['written', 'retried', 'failed'])
+
+
+class MappedZip:
+    """A read-only memory map of an open zip archive."""
+
+    def __init__(self, zip_ref, archive_map):
+        self.zip_ref = zip_ref
+        self.map = archive_map
+        self.view = memoryview(archive_map)
+
+    @classmethod
+    def open(cls, zip_ref):
+        """Map the archive behind zip_ref, or return None where it cannot be mapped."""
+        try:
+            archive_map = mmap.mmap(zip_ref.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            return None  # Not a real file, empty, or too big for the address space
+        return cls(zip_ref, archive_map)
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def data_offset(self, info):
+        """Where the member's data starts, after its local header."""
+        header = LOCAL_HEADER.unpack(self.view[info.header_offset:info.header_offset + LOCAL_HEADER.size])
+        if header[0] != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+        return info.header_offset + LOCAL_HEADER.size + header[10] + header[11]
+
+    def can_write(self, info):
+        return not info.flag_bits & 0x1 and info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+    def _release(self, start, end):
+        """Drop the mapped pages between start and end from memory once they are written."""
+        start = -(-start // PAGE_SIZE) * PAGE_SIZE
+        end = end // PAGE_SIZE * PAGE_SIZE
+        if end > start and hasattr(self.map, 'madvise') and hasattr(mmap, 'MADV_DONTNEED'):
+            self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def write_member(self, info, dst_path):
+        """Write a stored or deflated member to dst_path, checking its CRC-32."""
+        start = self.data_offset(info)
+        end = start + info.compress_size
+        if end > len(self.map):
+            raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+        crc = 0
+        unshare(dst_path)
+        with open(dst_path, 'wb', buffering=0) as dst:
+            if info.compress_type == zipfile.ZIP_STORED:
+                for position in range(start, end, CHUNK_SIZE):
+                    chunk_end = min(position + CHUNK_SIZE, end)
+                    control.checkpoint(chunk_end - position)
+                    # Views are released on the way out, so an exception never keeps the map busy
+                    with self.view[position:chunk_end] as chunk:
+                        crc = zlib.crc32(chunk, crc)
+                        _write_all(dst, chunk)
+                    self._release(position, chunk_end)
+            else:
+                decompressor = zlib.decompressobj(-15)
+                position = start
+                while position < end or decompressor.unconsumed_tail:
+                    if decompressor.unconsumed_tail:
+                        data = decompressor.decompress(decompressor.unconsumed_tail, CHUNK_SIZE)
+                    else:
+                        chunk_end = min(position + CHUNK_SIZE, end)
+                        with self.view[position:chunk_end] as chunk:
+                            data = decompressor.decompress(chunk, CHUNK_SIZE)
+                        self._release(position, chunk_end)
+                        position = chunk_end
+                    control.checkpoint(len(data))
+                    crc = zlib.crc32(data, crc)
+                    _write_all(dst, data)
+                data = decompressor.flush()
+                crc = zlib.crc32(data, crc)
+                _write_all(dst, data)
+            written = dst.tell()
+        if written != info.file_size or crc != info.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+
+def _write_all(dst, data):
+    """Unbuffered writes can be short, so keep writing until everything is out."""
+    with memoryview(data) as view:
+        written = 0
+        while written < len(view):
+            with view[written:] as rest:
+                written += dst.write(rest)
+
+
+def write_member(zip_ref, info, dst_path, mapped=None):
+    """Decompress a single zip member straight into dst_path.
+
+    With a MappedZip of the archive, stored and deflated members are written
+    from the memory map instead of through zipfile's buffers.
+    """
+    if mapped is not None and mapped.can_write(info):
+        mapped.write_member(info, dst_path)
+        return
+    unshare(dst_path)
+    with zip_ref.open(info) as src, open(dst_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+            control.checkpoint(len(chunk))
+            dst.write(chunk)
+
+def extract_members(zip_path, jobs, on_written=None, workers=None):
+    """Decompress every job on a bounded pool of threads, largest members first.
+
+    Each worker opens its own ZipFile handle and map of the archive, so no
+    reads are serialised on a shared file object. on_written(job) is called
+    on the calling thread as each member finishes. Jobs must not share a
+    destination.
+
+    Members that fail their CRC-32 check are written up to WRITE_ATTEMPTS
+    times; what is left of one that never passes is removed, and the other
+    members carry on. Returns a WriteReport.
+    """
+    jobs = sorted(jobs, key=lambda job: -job.size)
+    if workers is None:
+        workers = DEFAULT_WORKERS
+
+    for directory in sorted({os.path.dirname(job.dst) for job in jobs}):
+        os.makedirs(directory, exist_ok=True)
+
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def write(job):
+        if not hasattr(local, 'zip_ref'):
+            local.zip_ref = zipfile.ZipFile(zip_path, 'r')
+            local.mapped = MappedZip.open(local.zip_ref)
+            with handles_lock:
+                handles.append((local.zip_ref, local.mapped))
+        control.checkpoint()
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                with tracing.file_span(job.dst, job.size):
+                    write_member(local.zip_ref, job.info, job.dst, local.mapped)
+                return job, attempt, None
+            except RETRY_ERRORS as e:
+                error = e
+                if attempt < WRITE_ATTEMPTS:
+                    time.sleep(RETRY_DELAY * attempt)
+        try:
+            os.remove(job.dst)
+        except OSError:
+            pass
+        return job, WRITE_ATTEMPTS, error
+
+    report = WriteReport([], [], [])
+
+    def finished(job, attempts, error):
+        if attempts > 1:
+            report.retried.append(job)
+        if error is not None:
+            report.failed.append((job, error))
+            return
+        report.written.append(job)
+        if on_written is not None:
+            on_written(job)
+
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                finished(*write(job))
+            return report
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [tracing.submit(pool, write, job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    finished(*future.result())
+            except BaseException:
+                stop_pending(futures)
+                raise
+        return report
+    finally:
+        for zip_ref, mapped in handles:
+            if mapped is not None:
+                mapped.close()
+            zip_ref.close()
+
+def describe_write_report(report):
+    """Console lines summing up a WriteReport: how many members passed, needed retries or failed."""
+    lines = [
+        f"Verification: {len(report.written)} files passed the CRC-32 check, "
+        f"{len(report.failed)} failed ({len(report.retried)} written more than once)."
+        ]
+    for job, error in report.failed:
+        lines.append(f"  FAILED {job.dst}: {error}")
+    return lines